@@ -0,0 +1,164 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import defaultdict
+
+from cardinality import DEFAULT_ERROR, EXACT_MODE, create_cardinality_counter
+from dedupe import EventDeduper
+from extract import REPLY_KIND, extract_real_ip, extract_record
+from latency import MAX_ENDPOINTS, OTHER_ENDPOINT, EndpointStat, normalize_endpoint
+from timestamps import TIMESTAMP_LENGTH, format_timestamp
+
+
+class Aggregator(ABC):
+    # 하나라도 빠뜨리면 스캔 도중이 아니라 만들 때 바로 실패한다
+    @abstractmethod
+    def feed(self, line):
+        pass
+
+    @abstractmethod
+    def merge(self, other):
+        pass
+
+    @abstractmethod
+    def result(self):
+        pass
+
+    def prime(self, line):
+        # 세지는 않고 앞선 줄을 기억만 해야 하는 집계기(중복 제거)가 덮어쓴다
+        pass
+
+
+class HandlerCounter(Aggregator):
+    def __init__(self, dispatcher, deduper=None):
+        self.dispatcher = dispatcher
+        self.counts = defaultdict(int)
+        # 같은 이벤트가 두 번 찍혀도 한 번만 센다. 여러 집계기가 하나를 같이 쓸 수 있다
+        self.deduper = deduper if deduper is not None else EventDeduper()
+
+    def feed(self, line):
+        match = self.dispatcher.match(line)
+        if match is None:
+            return
+        handler_func, event = match
+        if event is not None and self.deduper.seen(event):
+            return
+        try:
+            handler_func(line, self.counts)
+        except Exception:
+            pass
+
+    def prime(self, line):
+        match = self.dispatcher.match(line)
+        if match is not None and match[1] is not None:
+            self.deduper.seen(match[1])
+
+    def merge(self, other):
+        for key, value in other.counts.items():
+            self.counts[key] += value
+
+    def result(self):
+        return self.counts
+
+
+class VisitorCounter(Aggregator):
+    def __init__(self, mode=EXACT_MODE, error=DEFAULT_ERROR):
+        self.visitors = create_cardinality_counter(mode, error)
+
+    def feed(self, line):
+        x_real_ip = extract_real_ip(line)
+        if x_real_ip:
+            self.visitors.add(x_real_ip)
+
+    def merge(self, other):
+        self.visitors.merge(other.visitors)
+
+    def result(self):
+        return self.visitors.count()
+
+
+class EndpointStats(Aggregator):
+    def __init__(self, max_endpoints=MAX_ENDPOINTS):
+        self.max_endpoints = max_endpoints
+        self.endpoints = dict()
+
+    def feed(self, line):
+        # Reply 줄에 상태 코드와 응답 시간이 모두 있으니 요청 하나당 Reply 한 줄만 센다
+        record = extract_record(line, with_ip=False)
+        if record is None or record.kind != REPLY_KIND:
+            return
+        self._stat(normalize_endpoint(record.method, record.path)).add(record.latency_ms, record.status)
+
+    def merge(self, other):
+        for endpoint, stat in other.endpoints.items():
+            self._stat(endpoint).merge(stat)
+
+    def result(self):
+        return self.endpoints
+
+    def to_dict(self) -> dict:
+        return {endpoint: stat.to_dict() for endpoint, stat in self.endpoints.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        endpoint_stats = cls()
+        for endpoint, stat in data.items():
+            endpoint_stats.endpoints[endpoint] = EndpointStat.from_dict(stat)
+        return endpoint_stats
+
+    def _stat(self, endpoint):
+        stat = self.endpoints.get(endpoint)
+        if stat is None:
+            # 봇이 만드는 임의의 경로로 메모리가 늘지 않도록 개수를 제한한다
+            if len(self.endpoints) >= self.max_endpoints:
+                endpoint = OTHER_ENDPOINT
+                stat = self.endpoints.get(endpoint)
+            if stat is None:
+                stat = self.endpoints[endpoint] = EndpointStat()
+        return stat
+
+
+class WindowedAggregators(Aggregator):
+    # 끝이 같은 여러 창을 한 번에 센다. 시작 시각들로 자른 구간마다 따로 세고, 각 창은 자기 시작 이후 구간을 합쳐서 얻는다
+    def __init__(self, starts, create_aggregators):
+        self.starts = sorted(format_timestamp(start) for start in starts)
+        # 구간 경계에 걸친 중복 이벤트도 한 번만 세도록 구간끼리 같이 쓴다
+        deduper = EventDeduper()
+        self.segments = [create_aggregators(deduper) for _ in self.starts]
+
+    def feed(self, line):
+        index = bisect_right(self.starts, line[:TIMESTAMP_LENGTH]) - 1
+        if index < 0:
+            return
+        for aggregator in self.segments[index].values():
+            aggregator.feed(line)
+
+    def prime(self, line):
+        index = bisect_right(self.starts, line[:TIMESTAMP_LENGTH]) - 1
+        if index < 0:
+            return
+        for aggregator in self.segments[index].values():
+            aggregator.prime(line)
+
+    def merge(self, other):
+        for segment, other_segment in zip(self.segments, other.segments):
+            for key, aggregator in segment.items():
+                aggregator.merge(other_segment[key])
+
+    def result(self):
+        # 가장 짧은 창부터 (시작 시각, 집계기) 를 돌려준다. 다음 창을 만들 때 그대로 합쳐지므로 받은 즉시 써야 한다
+        merged = None
+        for start, segment in zip(reversed(self.starts), reversed(self.segments)):
+            if merged is None:
+                merged = segment
+            else:
+                for key, aggregator in merged.items():
+                    aggregator.merge(segment[key])
+            yield start, merged
+
+
+def feed_all(lines, aggregators):
+    # 로그를 한 번만 읽고 등록된 모든 집계기에 같은 줄을 넘긴다
+    for line in lines:
+        for aggregator in aggregators:
+            aggregator.feed(line)
+    return aggregators
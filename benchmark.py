@@ -0,0 +1,375 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from aggregators import VisitorCounter, feed_all
+from dispatcher import Dispatcher
+from extract import _decode_real_ip, extract_real_ip, extract_record
+from logreader import MMAP_ENGINE, TEXT_ENGINE, iter_lines_between
+from loggen import generate_lines, write_logs
+from parallel import scan_parallel
+from scheduler import EventScheduler
+from sinks import FSYNC_FLUSH, DryRunSink, FileWriterPool
+from tailer import LogTailer
+from timestamps import TimeWindow
+
+RESULTS_PATH = os.getenv('BENCH_RESULTS_PATH', 'bench_results.jsonl')
+SUITE_START = datetime(2025, 5, 18)
+
+REQUEST_LINE = '{timestamp} [http-nio-9011-exec-{thread}]  INFO com.yourssu.signal.config.filter.LoggingFilter - {{"Request":{{"Method":"GET /api/viewers/uuid - {latency}ms","Payload":{{}},"Headers": {{"host": "api.dev.signal.yourssu.com", "x-forwarded-path": "/api/viewers/uuid?uuid=4b3ab213-efd8-4ad5-869d-af4ce56fdc9b", "x-real-ip": "{ip}", "x-forwarded-proto": "https", "connection": "close", "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36", "accept": "*/*", "origin": "https://signal.dev.yourssu.com", "accept-language": "ko-KR,ko;q=0.9,en-GB;q=0.8,en;q=0.7"}}}},"Reply":{{"Payload":{{"timestamp":"2025-05-18T01:36:18.701542917+09:00","result":{{"id":141,"uuid":"4b3ab213-efd8-4ad5-869d-af4ce56fdc9b","ticket":20,"usedTicket":0,"purchasedProfiles":[]}}}}}}}}\n'
+REPLY_LINE = '{timestamp} [http-nio-9011-exec-{thread}]  INFO com.yourssu.signal.config.filter.LoggingFilter - {{"Reply":{{"Method":"GET /api/viewers/uuid - {latency}ms","Status":200}}}}\n'
+NOTIFICATION_LINES = [
+    '{timestamp} [http-nio-9011-exec-{thread}]  INFO com.yourssu.signal.infrastructure.Notification - Issued ticket&5374 4b3ab213 4 22\n',
+    '{timestamp} [http-nio-9011-exec-{thread}]  INFO com.yourssu.signal.infrastructure.Notification - Consumed ticket&leopold 1\n',
+    '{timestamp} [http-nio-9011-exec-{thread}]  INFO com.yourssu.signal.infrastructure.Notification - PayNotification&홍길동 5374\n',
+]
+
+
+def synthetic_lines(count, notification_ratio=0.02, seed=0) -> list:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        values = {
+            'timestamp': f"2025-05-18 {i // 3600000 % 24:02d}:{i // 60000 % 60:02d}:{i // 1000 % 60:02d}.{i % 1000:03d}",
+            'thread': rng.randint(1, 10),
+            'latency': rng.randint(5, 400),
+            'ip': f"10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)}",
+        }
+        if rng.random() < notification_ratio:
+            template = rng.choice(NOTIFICATION_LINES)
+        else:
+            template = REQUEST_LINE if i % 2 == 0 else REPLY_LINE
+        lines.append(template.format(**values))
+    return lines
+
+
+def noop(line):
+    pass
+
+
+def linear_match(handlers, line):
+    for prefix, handler_func in handlers.items():
+        if prefix in line:
+            return handler_func
+    return None
+
+
+def bench(name, func, lines, repeat=3):
+    best = min(_timed(func, lines) for _ in range(repeat))
+    print(f"{name:<24} {len(lines) / best:>14,.0f} lines/sec")
+
+
+def _timed(func, lines) -> float:
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return time.perf_counter() - start
+
+
+def bench_dispatcher(lines):
+    # observer 는 설정 없이 불러오면 실패하므로 다른 벤치마크와 같은 방법으로 불러온다
+    with tempfile.TemporaryDirectory() as root:
+        observer = _load_observer(root)
+    handlers = {prefix: noop for prefix in observer.handler}
+    dispatcher = Dispatcher(handlers)
+    bench('linear prefix scan', lambda line: linear_match(handlers, line), lines)
+    bench('dispatcher', dispatcher.match, lines)
+
+
+def strptime_filter(line, time_threshold):
+    try:
+        timestamp_str = ' '.join(line.split(' ')[:2])
+        return datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S.%f') >= time_threshold
+    except ValueError:
+        return False
+
+
+def bench_timestamp_filter(lines):
+    time_threshold = datetime(2025, 5, 18, 0, 1, 30, 500)
+    window = TimeWindow(time_threshold)
+    bench('strptime filter', lambda line: strptime_filter(line, time_threshold), lines)
+    bench('fixed-layout filter', window.contains, lines)
+
+
+def bench_extract(lines):
+    bench('json.loads x-real-ip', _decode_real_ip, lines)
+    bench('targeted x-real-ip', extract_real_ip, lines)
+    bench('targeted record', extract_record, lines)
+
+
+def bench_reader_engines(megabytes=300, markers=None):
+    # 수백 MB 짜리 하루 로그를 만들어 같은 구간을 두 방식으로 읽어 본다
+    with tempfile.TemporaryDirectory() as root:
+        directory = os.path.join(root, '2025-05-18')
+        os.makedirs(directory)
+        chunk = ''.join(synthetic_lines(10000)).encode('utf-8')
+        with open(os.path.join(directory, '0.log'), 'wb') as file:
+            for _ in range(megabytes * 1024 * 1024 // len(chunk) + 1):
+                file.write(chunk)
+
+        start, end = datetime(2025, 5, 18, 0, 0, 9), datetime(2025, 5, 18, 23, 59)
+        for engine in (TEXT_ENGINE, MMAP_ENGINE):
+            began = time.perf_counter()
+            kept = sum(1 for _ in iter_lines_between(start, end, root=root, use_index=False,
+                                                     engine=engine, markers=markers))
+            elapsed = time.perf_counter() - began
+            print(f"{engine + ' reader':<24} {megabytes / elapsed:>10,.0f} MB/sec ({kept:,} lines kept)")
+
+
+def bench_event_scheduler(lines, window=0.05):
+    # 한 줄 쓸 때마다 수정 이벤트가 오는 상황에서 매번 읽는 방식과 묶어서 읽는 방식을 비교
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, '0.log')
+        for name in ('per event', 'coalesced'):
+            open(path, 'w').close()
+            tailer = LogTailer(path, 0)
+            reads = []
+            process = lambda file_path: reads.append(sum(1 for _ in tailer.read_lines()))
+            scheduler = EventScheduler(process, window)
+            if name == 'coalesced':
+                scheduler.start()
+            began = time.perf_counter()
+            with open(path, 'a', encoding='utf-8') as file:
+                for line in lines:
+                    file.write(line)
+                    file.flush()
+                    if name == 'coalesced':
+                        scheduler.notify(path)
+                    else:
+                        started = time.monotonic()
+                        process(path)
+                        scheduler.latency.add((time.monotonic() - started) * 1000)
+            scheduler.stop()
+            elapsed = time.perf_counter() - began
+            tailer.close()
+            print(f"{name:<24} {len(lines) / elapsed:>10,.0f} events/sec ({len(reads):,} reads, {sum(reads):,} lines, "
+                  f"latency p50 {scheduler.latency.quantile(0.5)}ms p99 {scheduler.latency.quantile(0.99)}ms)")
+
+
+def _load_observer(root):
+    # 실제 설정 없이도 observer 를 불러오고, 만들어 둔 로그를 처음부터 읽게 한다
+    os.environ.setdefault('ENVIRONMENT', 'bench')
+    os.environ.setdefault('TICKET_PRICE_POLICY', '1000n1')
+    os.environ.setdefault('TICKET_PRICE_REGISTERED_POLICY', '500n1')
+    os.environ['CHECKPOINT_PATH'] = os.path.join(root, 'checkpoint.json')
+    import observer
+
+    observer.sink = DryRunSink()
+    observer.checkpoints.since = 0
+    return observer
+
+
+def case_observer_check(root, lines):
+    observer = _load_observer(root)
+    began = time.perf_counter()
+    for path in observer.list_log_files(os.path.join(root, 'logs')):
+        observer.check(path)
+    return {'seconds': time.perf_counter() - began, 'alerts': len(observer.sink.messages)}
+
+
+def case_observer_latency(root, lines, batch=100):
+    # 서버가 조금씩 덧붙이는 것처럼 쓰면서 첫 수정 이벤트부터 알림이 나가기까지 걸린 시간을 잰다
+    observer = _load_observer(root)
+    directory = os.path.join(root, 'live')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.abspath(os.path.join(directory, '0.log'))
+    generated = [line for current, line in generate_lines(lines, SUITE_START, seed=1)]
+    scheduler = EventScheduler(observer.check_any, observer.EVENT_COALESCE_SECONDS)
+    scheduler.start()
+    began = time.perf_counter()
+    with open(path, 'a', encoding='utf-8') as file:
+        for i in range(0, len(generated), batch):
+            file.writelines(generated[i:i + batch])
+            file.flush()
+            scheduler.notify(path)
+            time.sleep(0.001)
+    scheduler.stop()
+    return {'seconds': time.perf_counter() - began, 'lines': lines, 'alerts': len(observer.sink.messages),
+            'latency_p50_ms': scheduler.latency.quantile(0.5), 'latency_p99_ms': scheduler.latency.quantile(0.99)}
+
+
+def case_analysis_scan(root, lines):
+    import report
+
+    aggregators = report.create_aggregators()
+    began = time.perf_counter()
+    feed_all(iter_lines_between(SUITE_START, None, os.path.join(root, 'logs'), use_index=False), aggregators.values())
+    return {'seconds': time.perf_counter() - began, 'visitors': aggregators[report.VISITOR_COUNT_KEY].result()}
+
+
+def case_count_ip_addresses(root, lines):
+    counter = VisitorCounter()
+    began = time.perf_counter()
+    feed_all(iter_lines_between(SUITE_START, None, os.path.join(root, 'logs'), use_index=False), [counter])
+    return {'seconds': time.perf_counter() - began, 'visitors': counter.result()}
+
+
+def case_analysis_parallel(root, lines, workers=4):
+    import report
+
+    began = time.perf_counter()
+    aggregators = scan_parallel(SUITE_START, None, report.create_aggregators, workers, os.path.join(root, 'logs'),
+                                use_index=False)
+    return {'seconds': time.perf_counter() - began, 'visitors': aggregators[report.VISITOR_COUNT_KEY].result()}
+
+
+def bench_ticket_burst(count=20000):
+    # 티켓 오픈 직후처럼 발급/입금 알림이 몰릴 때 핸들러가 메시지를 만드는 속도
+    with tempfile.TemporaryDirectory() as root:
+        observer = _load_observer(root)
+        rng = random.Random(0)
+        templates = [
+            'Issued ticket&{verification} {uuid} 1 {available}',
+            'RetryIssuedTicket&{verification} {uuid} 1 {available} 홍길동',
+            'IssueTicketByBankDepositSms&홍길동 {amount}',
+            'PayNotification&홍길동 {verification}',
+        ]
+        lines = []
+        for i in range(count):
+            message = rng.choice(templates).format(verification=rng.randint(0, 9999), uuid=f'{rng.getrandbits(32):08x}',
+                                                   available=rng.randint(1, 50), amount=rng.choice((1000, 3000)))
+            lines.append(f"2025-05-18 20:{i // 60000 % 60:02d}:{i // 1000 % 60:02d}.{i % 1000:03d} "
+                         f"[http-nio-9011-exec-{i % 200}]  INFO com.yourssu.signal.infrastructure.Notification - {message}\n")
+        began = time.perf_counter()
+        for line in lines:
+            observer.dispatch(line)
+        elapsed = time.perf_counter() - began
+        print(f"{'ticket burst handlers':<24} {count / elapsed:>14,.0f} events/sec ({len(observer.sink.messages):,} messages)")
+
+
+def bench_file_sink(count=20000):
+    # createProfiles.txt 처럼 이벤트마다 한 줄씩 남기는 기록: 매번 열고 닫기 vs 버퍼를 거쳐 쓰기
+    content = 'Created profile: 홍길동 20240000 {}\n'
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'createProfiles.txt')
+        began = time.perf_counter()
+        for i in range(count):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(content.format(i))
+        print(f"{'open per event':<24} {count / (time.perf_counter() - began):>14,.0f} writes/sec")
+        for name, options, threaded in (('buffered writes', {}, False), ('buffered + fsync', {'fsync': FSYNC_FLUSH}, False),
+                                        ('writer thread + fsync', {'fsync': FSYNC_FLUSH}, True)):
+            os.remove(path)
+            began = time.perf_counter()
+            with FileWriterPool(**options) as files:
+                if threaded:
+                    files.start()
+                for i in range(count):
+                    files.write(path, content.format(i))
+            print(f"{name:<24} {count / (time.perf_counter() - began):>14,.0f} writes/sec")
+
+
+SUITE_CASES = [case_observer_check, case_observer_latency, case_analysis_scan, case_count_ip_addresses,
+               case_analysis_parallel]
+
+
+def _run_case(case, root, lines) -> dict:
+    # 알림 실패 같은 출력이 결과 표를 덮지 않게 한다
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = case(root, lines)
+    result.setdefault('lines', lines)
+    # 병렬 스캔의 작업자 프로세스까지 포함한 최대 RSS (리눅스는 KB 단위)
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    result['peak_rss_mb'] = round(peak_kb / 1024, 1)
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def load_results(results_path=RESULTS_PATH) -> list:
+    try:
+        with open(results_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def run_suite(lines=500000, results_path=RESULTS_PATH):
+    # 케이스마다 새 프로세스에서 돌려 최대 RSS 가 서로 섞이지 않게 하고, 결과는 지난 실행과 비교할 수 있게 쌓아 둔다
+    previous = {(record['case'], record['lines']): record for record in load_results(results_path)}
+    commit = _git_commit()
+    records = []
+    with tempfile.TemporaryDirectory() as root:
+        write_logs(os.path.join(root, 'logs'), lines, start=SUITE_START)
+        context = multiprocessing.get_context('spawn')
+        for case in SUITE_CASES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(_run_case, case, root, lines).result()
+            record = {'case': case.__name__, 'commit': commit, 'time': datetime.now().isoformat(timespec='seconds'),
+                      'lines_per_sec': round(result['lines'] / result['seconds']), **result}
+            records.append(record)
+
+            last = previous.get((record['case'], record['lines']))
+            change = ''
+            if last is not None:
+                change = f" ({record['lines_per_sec'] / last['lines_per_sec'] - 1:+.1%} vs {last['commit']})"
+            print(f"{record['case']:<28} {record['lines_per_sec']:>10,} lines/sec "
+                  f"{record['peak_rss_mb']:>8} MB{change}")
+
+    with open(results_path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return records
+
+
+def main(argv=None):
+    # 벤치마크마다 수백 MB 를 쓰거나 몇 분씩 걸리므로 고른 것만 돌린다
+    parser = argparse.ArgumentParser(description='로그 처리 경로의 처리량을 잽니다')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, default_lines, help):
+        command = commands.add_parser(name, help=help)
+        command.add_argument('--lines', type=int, default=default_lines, help='입력 줄(이벤트) 수')
+        return command
+
+    add_command('dispatcher', 200000, '접두사 선형 탐색 vs Dispatcher')
+    add_command('timestamps', 200000, 'strptime vs 고정 위치 시각 비교')
+    add_command('extract', 200000, 'json.loads vs 필요한 필드만 꺼내기')
+    readers = commands.add_parser('readers', help='text vs mmap 읽기 엔진')
+    readers.add_argument('--megabytes', type=int, default=300)
+    readers.add_argument('--markers', nargs='*', help="예: --markers Notification")
+    add_command('scheduler', 20000, '수정 이벤트마다 읽기 vs 묶어서 읽기')
+    add_command('burst', 20000, '티켓 알림이 몰릴 때의 핸들러 처리량')
+    add_command('file-sink', 20000, '이벤트마다 열기 vs 버퍼 쓰기')
+    suite = add_command('suite', 500000, f'고정 케이스를 돌려 {RESULTS_PATH} 에 쌓고 지난 결과와 비교')
+    suite.add_argument('--results', default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'dispatcher':
+        bench_dispatcher(synthetic_lines(args.lines))
+    elif args.command == 'timestamps':
+        bench_timestamp_filter(synthetic_lines(args.lines))
+    elif args.command == 'extract':
+        bench_extract(synthetic_lines(args.lines))
+    elif args.command == 'readers':
+        bench_reader_engines(args.megabytes, args.markers)
+    elif args.command == 'scheduler':
+        bench_event_scheduler(synthetic_lines(args.lines))
+    elif args.command == 'burst':
+        bench_ticket_burst(args.lines)
+    elif args.command == 'file-sink':
+        bench_file_sink(args.lines)
+    elif args.command == 'suite':
+        run_suite(args.lines, args.results)
+
+
+if __name__ == "__main__":
+    main()
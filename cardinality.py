@@ -0,0 +1,85 @@
+import hashlib
+import json
+import math
+
+EXACT_MODE = 'exact'
+HLL_MODE = 'hll'
+DEFAULT_ERROR = 0.01
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+
+class ExactCounter:
+    def __init__(self, values=None):
+        self.values = set(values or ())
+
+    def add(self, value):
+        self.values.add(value)
+
+    def merge(self, other):
+        self.values |= other.values
+
+    def count(self) -> int:
+        return len(self.values)
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(sorted(self.values)).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(json.loads(data.decode('utf-8')))
+
+
+class HyperLogLog:
+    def __init__(self, precision=None, error=DEFAULT_ERROR, registers=None):
+        # 표준 오차는 1.04 / sqrt(2 ** precision)
+        if precision is None:
+            precision = math.ceil(math.log2((1.04 / error) ** 2))
+        self.precision = min(max(precision, MIN_PRECISION), MAX_PRECISION)
+        self.size = 1 << self.precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"precision 이 다른 HyperLogLog 는 합칠 수 없습니다: {self.precision}, {other.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # 작은 값은 linear counting 이 더 정확하다
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(precision=data[0], registers=data[1:])
+
+
+def create_cardinality_counter(mode=EXACT_MODE, error=DEFAULT_ERROR):
+    if mode == EXACT_MODE:
+        return ExactCounter()
+    if mode == HLL_MODE:
+        return HyperLogLog(error=error)
+    raise ValueError(f"지원하지 않는 방문자 집계 방식입니다: {mode}")
+
+
+def load_cardinality_counter(data):
+    # HyperLogLog 는 precision 한 바이트로, 정확 모드는 JSON 배열 '[' 로 시작한다
+    if data[:1] == b'[':
+        return ExactCounter.from_bytes(data)
+    return HyperLogLog.from_bytes(data)
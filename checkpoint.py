@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+class CheckpointStore:
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+        data = self._load()
+        self.checkpoints = data.get('files', {})
+        # 체크포인트가 마지막으로 저장된 시각. 이후에 수정된 낯선 파일은 처음부터 읽는다
+        self.since = data.get('saved_at', time.time())
+
+    def get(self, file_path):
+        with self._lock:
+            return self.checkpoints.get(file_path)
+
+    def update(self, file_path, inode, offset, timestamp=None):
+        with self._lock:
+            checkpoint = self.checkpoints.setdefault(file_path, {})
+            checkpoint['inode'] = inode
+            checkpoint['offset'] = offset
+            if timestamp is not None:
+                checkpoint['timestamp'] = timestamp
+            self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'saved_at': time.time(), 'files': self.checkpoints}
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"체크포인트 읽기 실패: {self.path}, 에러: {e}")
+            return {}
@@ -0,0 +1,44 @@
+MINUTE_LENGTH = len('2025-05-18 01:36')
+# 같은 이벤트가 다시 찍혀도 잡을 수 있도록 기억하는 분 수. 뒤늦게 찍힌 줄도 이 안이면 잡힌다
+WINDOW_MINUTES = 10
+MAX_KEYS = 100000
+
+
+def event_key(event) -> int:
+    # (시각, 스레드, 이벤트, 내용) 이 모두 같으면 같은 이벤트가 두 번 기록된 것으로 본다
+    return hash((event.timestamp, event.thread, event.tag, event.payload))
+
+
+class EventDeduper:
+    def __init__(self, window_minutes=WINDOW_MINUTES, max_keys=MAX_KEYS):
+        self.window_minutes = window_minutes
+        self.max_keys = max_keys
+        self.duplicates = 0
+        # 분 -> 그 분에 본 이벤트 키. 분 수와 키 수 모두 상한이 있어 메모리가 일정하다
+        self._buckets = dict()
+        self._size = 0
+
+    def seen(self, event) -> bool:
+        # 처음 보면 기록하고 False, 이미 봤으면 True
+        key = event_key(event)
+        minute = event.line[:MINUTE_LENGTH]
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = self._buckets[minute] = set()
+            self._expire()
+            if minute not in self._buckets:
+                # 창보다 오래된 줄은 비교할 대상이 남아 있지 않다
+                return False
+        elif key in bucket:
+            self.duplicates += 1
+            return True
+        bucket.add(key)
+        self._size += 1
+        if self._size > self.max_keys:
+            self._expire()
+        return False
+
+    def _expire(self):
+        # 가장 이른 분부터 버린다. 새 분이 생길 때와 키가 넘칠 때만 불려서 평소 비용은 집합 조회 한 번이다
+        while len(self._buckets) > self.window_minutes or (self._size > self.max_keys and self._buckets):
+            self._size -= len(self._buckets.pop(min(self._buckets)))
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from timestamps import TIMESTAMP_LENGTH
+
+
+class LogEvent:
+    __slots__ = ('line', 'head', 'message')
+
+    def __init__(self, line, head, message):
+        self.line = line
+        # 'INFO com.yourssu.signal.infrastructure.Notification' 처럼 레벨과 로거 이름
+        self.head = head
+        self.message = message
+
+    @property
+    def timestamp(self) -> str:
+        return self.line[:TIMESTAMP_LENGTH]
+
+    @property
+    def thread(self) -> str:
+        return self.line[TIMESTAMP_LENGTH + 2:self.line.find('] ', TIMESTAMP_LENGTH)]
+
+    @property
+    def tag(self) -> str:
+        # Notification 이벤트 이름 ('Issued ticket&5374 ...' -> 'Issued ticket')
+        end = self.message.find('&')
+        return self.message.rstrip('\n') if end < 0 else self.message[:end]
+
+    @property
+    def payload(self) -> str:
+        start = self.message.find('&')
+        return '' if start < 0 else self.message[start + 1:].rstrip('\n')
+
+    def fields(self, separator=' ') -> list:
+        return self.payload.split(separator)
+
+
+def parse_line(line):
+    thread_end = line.find('] ', TIMESTAMP_LENGTH)
+    if thread_end < 0:
+        return None
+    separator = line.find(' -', thread_end)
+    if separator < 0:
+        return None
+    return LogEvent(line, line[thread_end + 2:separator].strip(), _message(line, separator))
+
+
+def _message(line, separator) -> str:
+    start = separator + 3 if line.startswith(' ', separator + 2) else separator + 2
+    return line[start:]
+
+
+class Dispatcher:
+    def __init__(self, handlers: dict):
+        # head -> {메시지 접두어: 핸들러}, 로거 이름으로 한 번에 찾는다
+        self._routes = defaultdict(dict)
+        # 'LEVEL logger - message' 형식이 아닌 접두어는 기존처럼 부분 문자열로 검사
+        self._fallback = []
+
+        for prefix, handler_func in handlers.items():
+            head, separator, message_prefix = prefix.partition(' -')
+            if separator and head.count(' ') == 1:
+                if message_prefix.startswith(' '):
+                    message_prefix = message_prefix[1:]
+                self._routes[head][message_prefix] = handler_func
+            else:
+                self._fallback.append((prefix, handler_func))
+        self._routes = dict(self._routes)
+
+    def markers(self) -> list:
+        # 핸들러에 걸릴 수 있는 줄에 반드시 들어 있는 문자열. 긴 로그에서 후보 줄만 빠르게 고를 때 쓴다
+        return [f'{head} -' for head in self._routes] + [prefix for prefix, handler_func in self._fallback]
+
+    def match(self, line):
+        thread_end = line.find('] ', TIMESTAMP_LENGTH)
+        separator = line.find(' -', thread_end) if thread_end >= 0 else -1
+        if separator >= 0:
+            # 대부분의 LoggingFilter 줄은 여기서 사전 조회 한 번으로 걸러진다
+            head = line[thread_end + 2:separator].strip()
+            routes = self._routes.get(head)
+            if routes is not None:
+                event = LogEvent(line, head, _message(line, separator))
+                end = event.message.find('&')
+                handler_func = routes.get(event.message[:end]) if end >= 0 else None
+                if handler_func is None:
+                    for message_prefix, route_func in routes.items():
+                        if event.message.startswith(message_prefix):
+                            handler_func = route_func
+                            break
+                if handler_func is not None:
+                    return handler_func, event
+
+        for prefix, handler_func in self._fallback:
+            if prefix in line:
+                return handler_func, parse_line(line)
+        return None
@@ -0,0 +1,120 @@
+import json
+
+MESSAGE_MARKER = ' - {"'
+REQUEST_MARKER = '{"Request":{"Method":"'
+REPLY_MARKER = '{"Reply":{"Method":"'
+HEADERS_KEY = '"Headers":'
+REAL_IP_KEY = '"x-real-ip":'
+STATUS_KEY = '"Status":'
+REPLY_KEY = '"Reply":'
+
+REQUEST_KIND = 'Request'
+REPLY_KIND = 'Reply'
+
+
+class RequestRecord:
+    __slots__ = ('kind', 'method', 'path', 'latency_ms', 'status', 'ip')
+
+    def __init__(self, kind, method, path, latency_ms, status=None, ip=None):
+        self.kind = kind
+        self.method = method
+        self.path = path
+        self.latency_ms = latency_ms
+        self.status = status
+        self.ip = ip
+
+
+def extract_record(line, with_ip=True):
+    # LoggingFilter 의 Request / Reply 줄에서 필요한 값만 dict 를 만들지 않고 잘라낸다
+    start = _message_start(line)
+    if line.startswith(REQUEST_MARKER, start):
+        kind = REQUEST_KIND
+        method_start = start + len(REQUEST_MARKER)
+    elif line.startswith(REPLY_MARKER, start):
+        kind = REPLY_KIND
+        method_start = start + len(REPLY_MARKER)
+    else:
+        return None
+
+    method_end = line.find('"', method_start)
+    if method_end < 0:
+        return None
+    method, path, latency_ms = _split_method(line[method_start:method_end])
+    record = RequestRecord(kind, method, path, latency_ms)
+    if kind == REPLY_KIND:
+        record.status = _extract_status(line, method_end)
+    elif with_ip:
+        record.ip = extract_real_ip(line)
+    return record
+
+
+def extract_real_ip(line):
+    start = _message_start(line)
+    if not line.startswith(REQUEST_MARKER, start):
+        # Reply / Notification 줄에는 헤더가 없으니 JSON 처럼 보일 때만 전체 디코딩
+        if line.startswith('{', start) and not line.startswith(REPLY_MARKER, start):
+            return _decode_real_ip(line)
+        return None
+    if line.find(MESSAGE_MARKER, start) >= 0:
+        # 개행 없이 다른 로그가 이어 붙은 줄 등은 전체 디코딩으로 판단
+        return _decode_real_ip(line)
+
+    # Payload 는 클라이언트가 보낸 그대로라 Reply 직전의 마지막 Headers 만 믿는다
+    reply = line.rfind(REPLY_KEY, start)
+    if reply < 0:
+        reply = len(line)
+    headers = line.rfind(HEADERS_KEY, start, reply)
+    if headers < 0:
+        return _decode_real_ip(line)
+    key = line.find(REAL_IP_KEY, headers, reply)
+    if key < 0:
+        return None
+
+    value_start = key + len(REAL_IP_KEY)
+    while line.startswith(' ', value_start):
+        value_start += 1
+    value_end = line.find('"', value_start + 1)
+    if not line.startswith('"', value_start) or value_end < 0:
+        return _decode_real_ip(line)
+    value = line[value_start + 1:value_end]
+    if '\\' in value:
+        return _decode_real_ip(line)
+    return value or None
+
+
+def _message_start(line) -> int:
+    start = line.find(' - ')
+    return len(line) if start < 0 else start + 3
+
+
+def _decode_real_ip(line):
+    try:
+        json_str = line.split(' - ', 1)[1].strip()
+        data = json.loads(json_str)
+        return data.get('Request', {}).get('Headers', {}).get('x-real-ip')
+    except Exception:
+        return None
+
+
+def _split_method(value):
+    # 'GET /api/viewers/uuid - 15ms' -> ('GET', '/api/viewers/uuid', 15)
+    request, separator, latency = value.rpartition(' - ')
+    if not separator:
+        request, latency = value, ''
+    method, _, path = request.partition(' ')
+    try:
+        latency_ms = int(latency[:-2]) if latency.endswith('ms') else None
+    except ValueError:
+        latency_ms = None
+    return method, path, latency_ms
+
+
+def _extract_status(line, start):
+    key = line.find(STATUS_KEY, start)
+    if key < 0:
+        return None
+    end = key + len(STATUS_KEY)
+    while end < len(line) and line[end].isdigit():
+        end += 1
+    digits = line[key + len(STATUS_KEY):end]
+    return int(digits) if digits else None
@@ -0,0 +1,111 @@
+import hashlib
+import math
+import re
+import threading
+import time
+
+from collections import OrderedDict, deque
+
+WINDOW_SECONDS = 600
+SUMMARY_INTERVAL_SECONDS = 300
+MAX_FINGERPRINTS = 1000
+MAX_SAMPLE_LENGTH = 2000
+
+# 요청마다 달라지는 값은 지워서 같은 원인의 오류가 같은 지문을 갖게 한다
+UUID_PATTERN = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+HEX_PATTERN = re.compile(r'\b(?:0x)?[0-9a-fA-F]{8,}\b')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def normalize_error(message) -> str:
+    message = UUID_PATTERN.sub('<uuid>', message.strip())
+    # 영문 단어가 지워지지 않도록 숫자가 섞인 16진수만 바꾼다
+    message = HEX_PATTERN.sub(lambda match: '<hex>' if any(c.isdigit() for c in match.group()) else match.group(), message)
+    return NUMBER_PATTERN.sub('<n>', message)
+
+
+def fingerprint(message) -> str:
+    return hashlib.blake2b(normalize_error(message).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ErrorState:
+    __slots__ = ('sample', 'buckets', 'total', 'suppressed', 'last_sent')
+
+    def __init__(self, sample):
+        self.sample = sample[:MAX_SAMPLE_LENGTH]
+        # (초, 그 초에 난 횟수). 폭주해도 창 길이(초)만큼만 쌓인다
+        self.buckets = deque()
+        self.total = 0
+        self.suppressed = 0
+        self.last_sent = None
+
+    def add(self, second):
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += 1
+        else:
+            self.buckets.append([second, 1])
+        self.total += 1
+
+    def expire(self, before):
+        while self.buckets and self.buckets[0][0] < before:
+            self.total -= self.buckets.popleft()[1]
+
+
+class ErrorStormGuard:
+    def __init__(self, window=WINDOW_SECONDS, summary_interval=SUMMARY_INTERVAL_SECONDS,
+                 max_fingerprints=MAX_FINGERPRINTS):
+        self.window = window
+        self.summary_interval = summary_interval
+        self.max_fingerprints = max_fingerprints
+        self.suppressed = 0
+        # 지문 -> 상태, 가장 오래 안 본 지문부터 밀어낸다
+        self._states = OrderedDict()
+        # 밀려난 지문의 아직 보내지 않은 요약. 다음 due_summaries 에서 주기와 상관없이 내보낸다
+        self._evicted = []
+        self._lock = threading.Lock()
+
+    def record(self, message, now=None) -> bool:
+        # 창 안에서 처음 본 오류만 바로 보내고 나머지는 세어 두었다가 요약으로 보낸다
+        now = time.time() if now is None else now
+        key = fingerprint(message)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = ErrorState(message)
+                if len(self._states) > self.max_fingerprints:
+                    evicted = self._states.popitem(last=False)[1]
+                    if evicted.suppressed:
+                        self._evicted.append(self._summary(evicted, now))
+            else:
+                self._states.move_to_end(key)
+            state.expire(int(now) - self.window)
+            first = state.total == 0
+            state.add(int(now))
+            if first:
+                if state.suppressed:
+                    # 요약을 내보내기 전에 창이 지나갔으면 묶어 둔 건수를 버리지 않는다
+                    self._evicted.append(self._summary(state, now))
+                state.sample = message[:MAX_SAMPLE_LENGTH]
+                state.last_sent = now
+                state.suppressed = 0
+                return True
+            state.suppressed += 1
+            self.suppressed += 1
+            return False
+
+    def due_summaries(self, now=None) -> list:
+        # (대표 메시지, 보내지 않은 건수, 지난 알림 뒤 흐른 분) 목록
+        now = time.time() if now is None else now
+        with self._lock:
+            summaries, self._evicted = self._evicted, []
+            for state in self._states.values():
+                if state.suppressed and now - state.last_sent >= self.summary_interval:
+                    summaries.append(self._summary(state, now))
+                    state.suppressed = 0
+                    state.last_sent = now
+        return summaries
+
+    @staticmethod
+    def _summary(state, now) -> tuple:
+        minutes = max(math.ceil((now - state.last_sent) / 60), 1)
+        return state.sample, state.suppressed, minutes
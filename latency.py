@@ -0,0 +1,105 @@
+import math
+import re
+
+RELATIVE_ACCURACY = 0.02
+MAX_ENDPOINTS = 200
+OTHER_ENDPOINT = 'OTHER'
+ID_SEGMENT_PATTERN = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27})$')
+
+
+class LatencyHistogram:
+    # 상대 오차가 일정한 로그 버킷 (DDSketch 방식). 10분짜리 응답도 버킷 수백 개로 충분하다
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, buckets=None, total=None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = dict(buckets or {})
+        self.count = sum(self.buckets.values())
+        # 평균을 구할 수 있도록 값의 합도 센다. 합이 없던 예전 기록은 버킷 대표값으로 어림한다
+        self.sum = total if total is not None else sum(self._value(index) * count
+                                                       for index, count in self.buckets.items())
+
+    def add(self, value_ms, count=1):
+        index = math.ceil(math.log(max(value_ms, 0) + 1) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += max(value_ms, 0) * count
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(f"정확도가 다른 히스토그램은 합칠 수 없습니다: {self.relative_accuracy}, {other.relative_accuracy}")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return max(round(self._value(index)), 0)
+        return None
+
+    def to_dict(self) -> dict:
+        return {'accuracy': self.relative_accuracy, 'buckets': self.buckets, 'sum': self.sum}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['accuracy'], {int(index): count for index, count in data['buckets'].items()}, data.get('sum'))
+
+    def _value(self, index) -> float:
+        return 2 * self.gamma ** index / (1 + self.gamma) - 1
+
+
+class EndpointStat:
+    def __init__(self, count=0, client_errors=0, server_errors=0, histogram=None):
+        self.count = count
+        self.client_errors = client_errors
+        self.server_errors = server_errors
+        self.histogram = histogram or LatencyHistogram()
+
+    def add(self, latency_ms, status):
+        self.count += 1
+        if status is not None:
+            if 400 <= status < 500:
+                self.client_errors += 1
+            elif status >= 500:
+                self.server_errors += 1
+        if latency_ms is not None:
+            self.histogram.add(latency_ms)
+
+    def merge(self, other):
+        self.count += other.count
+        self.client_errors += other.client_errors
+        self.server_errors += other.server_errors
+        self.histogram.merge(other.histogram)
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'client_errors': self.client_errors,
+                'server_errors': self.server_errors, 'histogram': self.histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['count'], data['client_errors'], data['server_errors'],
+                   LatencyHistogram.from_dict(data['histogram']))
+
+
+def normalize_endpoint(method, path) -> str:
+    # /api/profiles/622 처럼 식별자가 들어간 경로는 하나로 묶는다
+    segments = ['{id}' if ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split('/')]
+    return f"{method} {'/'.join(segments)}"
+
+
+def endpoint_report_lines(endpoints: dict, minutes, limit=10) -> list:
+    lines = []
+    ranked = sorted(endpoints.items(), key=lambda item: item[1].count, reverse=True)
+    for endpoint, stat in ranked[:limit]:
+        histogram = stat.histogram
+        lines.append(f"{endpoint} : {stat.count}건 ({stat.count / max(minutes, 1):.1f}/분) "
+                     f"p50 {histogram.quantile(0.5)}ms p95 {histogram.quantile(0.95)}ms p99 {histogram.quantile(0.99)}ms "
+                     f"4xx {stat.client_errors / stat.count:.1%} 5xx {stat.server_errors / stat.count:.1%}")
+    return lines
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from datetime import datetime
+
+from cardinality import HyperLogLog
+from extract import REPLY_KIND, extract_record
+
+STATS_WINDOW_SECONDS = 300
+STATS_BUCKET_SECONDS = 10
+# 칸마다 스케치를 하나씩 두므로 정확도보다 크기를 우선한다 (precision 12, 칸당 4KB)
+VISITOR_ERROR = 0.02
+MINUTE_LENGTH = len('2025-05-18 01:36')
+
+
+class RingCounter:
+    # 창을 같은 길이의 칸으로 나눈 고리. 더하기는 O(1), 메모리는 칸 수만큼이다
+    def __init__(self, window_seconds=STATS_WINDOW_SECONDS, bucket_seconds=STATS_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.size = max(window_seconds // bucket_seconds, 1)
+        # 칸마다 몇 번째 칸(epoch // bucket_seconds)의 값인지 같이 두어, 오래된 칸은 쓸 때 비운다
+        self.slots = [-1] * self.size
+        self.values = [0] * self.size
+
+    def add(self, second, value=1):
+        slot = int(second // self.bucket_seconds)
+        index = slot % self.size
+        if self.slots[index] != slot:
+            if self.slots[index] > slot:
+                return  # 창보다 늦게 도착한 줄
+            self.slots[index] = slot
+            self.values[index] = 0
+        self.values[index] += value
+
+    def total(self, now) -> int:
+        # 시계가 앞선 줄이 만든 미래의 칸은 아직 창에 넣지 않는다
+        newest = int(now // self.bucket_seconds)
+        oldest = newest - self.size
+        return sum(value for slot, value in zip(self.slots, self.values) if oldest < slot <= newest)
+
+
+class RingDistinct:
+    # RingCounter 와 같은 고리에 칸마다 HyperLogLog 를 둔다. 셀 때만 칸들을 합친다
+    def __init__(self, window_seconds=STATS_WINDOW_SECONDS, bucket_seconds=STATS_BUCKET_SECONDS, error=VISITOR_ERROR):
+        self.bucket_seconds = bucket_seconds
+        self.error = error
+        self.size = max(window_seconds // bucket_seconds, 1)
+        self.slots = [-1] * self.size
+        self.sketches = [HyperLogLog(error=error) for _ in range(self.size)]
+
+    def add(self, second, value):
+        slot = int(second // self.bucket_seconds)
+        index = slot % self.size
+        if self.slots[index] != slot:
+            if self.slots[index] > slot:
+                return
+            self.slots[index] = slot
+            self.sketches[index] = HyperLogLog(error=self.error)
+        self.sketches[index].add(value)
+
+    def count(self, now) -> int:
+        newest = int(now // self.bucket_seconds)
+        oldest = newest - self.size
+        merged = HyperLogLog(error=self.error)
+        for slot, sketch in zip(self.slots, self.sketches):
+            if oldest < slot <= newest:
+                merged.merge(sketch)
+        return merged.count()
+
+
+class LiveStats:
+    # 감시하며 읽는 줄로 최근 창의 요청 수, 방문자, 5xx, 이벤트 수를 센다. 줄의 기록 시각 기준이라 밀린 줄을 몰아 읽어도 창이 부풀지 않는다
+    def __init__(self, window_seconds=STATS_WINDOW_SECONDS, bucket_seconds=STATS_BUCKET_SECONDS,
+                 visitor_error=VISITOR_ERROR):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.requests = RingCounter(window_seconds, bucket_seconds)
+        self.server_errors = RingCounter(window_seconds, bucket_seconds)
+        self.visitors = RingDistinct(window_seconds, bucket_seconds, visitor_error)
+        self.events = dict()
+        self.last_request_at = None
+        self._minute = (None, None)
+        # 처리 스레드가 더하고 메인 루프와 지표 서버가 읽는다
+        self._lock = threading.Lock()
+
+    def feed(self, line):
+        record = extract_record(line)
+        if record is None:
+            return
+        second = self._now(line)
+        with self._lock:
+            if record.kind == REPLY_KIND:
+                self.requests.add(second)
+                if record.status is not None and record.status >= 500:
+                    self.server_errors.add(second)
+                if self.last_request_at is None or second > self.last_request_at:
+                    self.last_request_at = second
+            elif record.ip:
+                self.visitors.add(second, record.ip)
+
+    def count(self, key, line):
+        second = self._now(line)
+        with self._lock:
+            ring = self.events.get(key)
+            if ring is None:
+                ring = self.events[key] = RingCounter(self.window_seconds, self.bucket_seconds)
+            ring.add(second)
+
+    def error_rate(self, now=None):
+        # (5xx 비율, 요청 수). 요청이 없으면 비율은 0
+        now = time.time() if now is None else now
+        with self._lock:
+            requests = self.requests.total(now)
+            errors = self.server_errors.total(now)
+        return (errors / requests if requests else 0.0), requests
+
+    def snapshot(self, now=None) -> dict:
+        now = time.time() if now is None else now
+        minutes = self.window_seconds / 60
+        with self._lock:
+            requests = self.requests.total(now)
+            errors = self.server_errors.total(now)
+            return {
+                'requests_per_minute': requests / minutes,
+                'visitors': self.visitors.count(now),
+                'error_rate': errors / requests if requests else 0.0,
+                'events': {key: ring.total(now) for key, ring in self.events.items()},
+            }
+
+    def _now(self, line) -> float:
+        # 시계가 앞선 서버의 줄은 지금 들어온 것으로 센다. 미래 칸이 아직 살아 있는 칸을 밀어내거나,
+        # 마지막 요청 시각이 미래로 가서 조용한 시간이 음수가 되는 일을 막는다
+        return min(self._epoch(line), time.time())
+
+    def _epoch(self, line) -> float:
+        # 같은 분의 줄은 분 단위 변환 결과에 초만 더한다. 로그는 서버 현지 시각으로 찍힌다
+        minute = line[:MINUTE_LENGTH]
+        cached_minute, epoch = self._minute
+        if cached_minute != minute:
+            try:
+                epoch = datetime.strptime(minute, '%Y-%m-%d %H:%M').timestamp()
+            except ValueError:
+                return time.time()
+            self._minute = (minute, epoch)
+        try:
+            return epoch + int(line[MINUTE_LENGTH + 1:MINUTE_LENGTH + 3])
+        except ValueError:
+            return epoch
+
+
+class AlertRule:
+    # condition 이 설명 문구를 돌려주기 시작할 때 한 번, 다시 None 이 될 때 한 번만 알린다
+    def __init__(self, name, condition):
+        self.name = name
+        self.condition = condition
+        self.firing = False
+
+    def evaluate(self, now=None):
+        # (발생 여부, 설명) 을 상태가 바뀔 때만 돌려주고, 그대로면 None
+        detail = self.condition(time.time() if now is None else now)
+        if (detail is not None) == self.firing:
+            return None
+        self.firing = detail is not None
+        return self.firing, detail
@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+
+from datetime import datetime, timedelta
+
+from timestamps import format_timestamp
+
+MAX_FILE_BYTES = 100 * 1024 * 1024
+LOGGING_FILTER = 'INFO com.yourssu.signal.config.filter.LoggingFilter'
+NOTIFICATION = 'INFO com.yourssu.signal.infrastructure.Notification'
+
+REQUEST_MESSAGE = '{{"Request":{{"Method":"{method} {path} - {latency}ms","Payload":{payload},"Headers": {{"host": "api.dev.signal.yourssu.com", "x-forwarded-server": "api.dev.signal.yourssu.com", "x-forwarded-path": "{path}", "x-real-ip": "{ip}", "x-forwarded-proto": "https", "connection": "close", "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36", "accept": "*/*", "origin": "https://signal.dev.yourssu.com", "accept-language": "ko-KR,ko;q=0.9,en-GB;q=0.8,en;q=0.7"}}}},"Reply":{{"Payload":{{"timestamp":"2025-05-18T01:36:18.701542917+09:00","result":{{"id":141,"ticket":20,"usedTicket":0,"purchasedProfiles":[]}}}}}}}}'
+REPLY_MESSAGE = '{{"Reply":{{"Method":"{method} {path} - {latency}ms","Status":{status}}}}}'
+PROFILE_PAYLOAD = '{  "gender": "MALE",  "department": "학과",  "birthYear": 2000,  "animal": "DOG",  "contact": "@leo",  "mbti": "ISTJ",  "nickname": "leopold",  "introSentences" : ["나는 딸기를 좋아해", "나는 포도도 좋아해"]}'
+
+# (메서드, 경로, 정상 응답 코드, 요청 본문, 비중)
+ENDPOINTS = [
+    ('GET', '/api/viewers/uuid', 200, '{}', 50),
+    ('GET', '/api/profiles/{id}', 200, '{}', 20),
+    ('GET', '/api/profiles/random', 200, '{}', 15),
+    ('POST', '/api/profiles', 201, PROFILE_PAYLOAD, 5),
+    ('POST', '/api/viewers', 201, '{}', 5),
+    ('POST', '/api/profiles/contact', 200, '{}', 5),
+]
+NOTIFICATIONS = [
+    'CreateProfile&{id}&학과&@leo{id}&leopold{id}&나는 딸기를 좋아해',
+    'FailedProfileContactExceedsLimit&3',
+    'ContactExceedsLimitWarning&2',
+    'Issued ticket&{verification} {uuid} {ticket} {available}',
+    'RetryIssuedTicket&{verification} {uuid} {ticket} {available} 홍길동',
+    'Consumed ticket&leopold{id} {ticket}',
+    'IssueTicketByBankDepositSms&홍길동 {amount}',
+    'IssueFailedTicketByDepositAmount&홍길동 {amount}',
+    'IssueFailedTicketByUnMatchedVerification&홍길동 {amount}',
+    'PayNotification&홍길동 {verification}',
+    'NoFirstPurchasedTicket&홍길동 {amount}',
+]
+SERVER_RESTART = ("INFO org.springframework.boot.web.embedded.tomcat.TomcatWebServer - "
+                  "Tomcat started on port 9011 (http) with context path '/'")
+INTERNAL_ERROR = 'ERROR com.yourssu.signal.handler.InternalServerErrorControllerAdvice'
+STACK_TRACE = [
+    'java.lang.IllegalStateException: profile not found\n',
+    '\tat com.yourssu.signal.domain.profile.application.ProfileService.getProfile(ProfileService.kt:42)\n',
+    '\tat org.springframework.web.servlet.FrameworkServlet.service(FrameworkServlet.java:885)\n',
+]
+MALFORMED_LINES = [
+    '\n',
+    '\x00\x00\x00\x00\n',
+    '2025-05-1\n',
+    'Caused by: java.net.SocketTimeoutException: Read timed out\n',
+]
+
+
+def generate_lines(count, start=datetime(2025, 5, 18), rate=50.0, visitors=5000, notification_ratio=0.01,
+                   error_ratio=0.001, restart_ratio=0.00001, disorder_ratio=0.001, malformed_ratio=0.0005, seed=0):
+    # (시각, 줄) 을 만든다. 시각은 파일을 날짜별로 나눌 때 쓰는 실제 흐름이고, 줄 안의 시각은 뒤섞일 수 있다
+    rng = random.Random(seed)
+    weights = [endpoint[4] for endpoint in ENDPOINTS]
+    current = start
+    produced = 0
+    while produced < count:
+        current += timedelta(seconds=rng.expovariate(rate))
+        stamp = current
+        if rng.random() < disorder_ratio:
+            # 늦게 기록된 줄처럼 시각이 몇 분 앞선 줄
+            stamp -= timedelta(seconds=rng.uniform(1, 600))
+        thread = rng.randint(1, 200)
+        roll = rng.random()
+
+        if roll < malformed_ratio:
+            line = rng.choice(MALFORMED_LINES)
+            if rng.random() < 0.5:
+                # 개행이 빠져 다음 줄과 이어 붙은 경우와 중간에 잘린 경우
+                line = _line(stamp, thread, NOTIFICATION, 'Issued ticket&0000 broken 1 1')[:-1]
+            lines = [line]
+        elif roll < malformed_ratio + restart_ratio:
+            lines = [_line(stamp, 'main', *SERVER_RESTART.split(' - ', 1))]
+        elif roll < malformed_ratio + restart_ratio + error_ratio:
+            lines = [_line(stamp, thread, INTERNAL_ERROR, f'서버 오류가 발생했습니다 {rng.randint(1, 50)}')] + STACK_TRACE
+        elif roll < malformed_ratio + restart_ratio + error_ratio + notification_ratio:
+            template = rng.choice(NOTIFICATIONS)
+            message = template.format(id=rng.randint(1, 10000), verification=f'{rng.randint(0, 9999):04d}',
+                                      uuid=f'{rng.getrandbits(32):08x}', ticket=rng.randint(1, 10),
+                                      available=rng.randint(1, 50), amount=rng.choice((1000, 3000, 5000, 7777)))
+            lines = [_line(stamp, thread, NOTIFICATION, message)]
+        else:
+            method, path, status, payload, weight = rng.choices(ENDPOINTS, weights)[0]
+            path = path.replace('{id}', str(rng.randint(1, 10000)))
+            latency = int(rng.lognormvariate(3, 1))
+            if rng.random() < 0.03:
+                status = rng.choice((400, 404, 500))
+            visitor = rng.randint(1, visitors)
+            values = {'method': method, 'path': path, 'latency': latency, 'status': status, 'payload': payload,
+                      'ip': f'10.{visitor >> 16 & 255}.{visitor >> 8 & 255}.{visitor & 255}'}
+            lines = [_line(stamp, thread, LOGGING_FILTER, REQUEST_MESSAGE.format(**values)),
+                     _line(stamp + timedelta(milliseconds=2), thread, LOGGING_FILTER, REPLY_MESSAGE.format(**values))]
+
+        for line in lines:
+            if produced >= count:
+                return
+            produced += 1
+            yield current, line
+
+
+def write_logs(root, count, max_file_bytes=MAX_FILE_BYTES, **options) -> list:
+    # 서버와 같은 logs/YYYY-MM-DD/N.log 구조로 쓰고 크기가 넘으면 다음 번호로 넘긴다
+    paths = []
+    file = None
+    directory = None
+    for current, line in generate_lines(count, **options):
+        date_directory = os.path.join(root, current.strftime('%Y-%m-%d'))
+        if date_directory != directory or file.tell() >= max_file_bytes:
+            if file is not None:
+                file.close()
+            sequence = 0 if date_directory != directory else sequence + 1
+            directory = date_directory
+            os.makedirs(directory, exist_ok=True)
+            paths.append(os.path.join(directory, f'{sequence}.log'))
+            file = open(paths[-1], 'w', encoding='utf-8')
+        file.write(line)
+    if file is not None:
+        file.close()
+    return paths
+
+
+def _line(stamp, thread, head, message) -> str:
+    thread_name = thread if isinstance(thread, str) else f'http-nio-9011-exec-{thread}'
+    return f'{format_timestamp(stamp)} [{thread_name}]  {head} - {message}\n'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='시그널 서버 형식의 로그를 만듭니다')
+    parser.add_argument('root', help='로그를 쓸 디렉터리')
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--start', default='2025-05-18 00:00', help="첫 줄 시각 (예: '2025-05-18 00:00')")
+    parser.add_argument('--rate', type=float, default=50.0, help='초당 줄 수')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    written = write_logs(args.root, args.lines, start=datetime.strptime(args.start, '%Y-%m-%d %H:%M'),
+                         rate=args.rate, seed=args.seed)
+    print(f"{args.lines}줄을 파일 {len(written)}개에 썼습니다")
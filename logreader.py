@@ -0,0 +1,346 @@
+import gzip
+import io
+import json
+import mmap
+import os
+import re
+import tempfile
+import zlib
+
+from datetime import datetime, timedelta
+
+from timeindex import INDEX_TOLERANCE, TimeIndex, index_path_for
+from timestamps import TIMESTAMP_LENGTH, TimeWindow, has_timestamp
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG_ROOT = '/home/ubuntu/signal-api/logs/'
+TEXT_ENGINE = 'text'
+MMAP_ENGINE = 'mmap'
+READER_ENGINE = os.getenv('LOG_READER_ENGINE', TEXT_ENGINE)
+
+LOG_SUFFIX = '.log'
+GZIP_SUFFIX = '.gz'
+ZSTD_SUFFIX = '.zst'
+# zstandard 가 없으면 .zst 파일은 읽을 수 없으니 로그 목록에서도 뺀다
+COMPRESSED_SUFFIXES = (GZIP_SUFFIX, ZSTD_SUFFIX) if zstandard is not None else (GZIP_SUFFIX,)
+LOG_FILE_SUFFIXES = (LOG_SUFFIX,) + tuple(LOG_SUFFIX + suffix for suffix in COMPRESSED_SUFFIXES)
+# 압축 파일을 풀어 둔 블록과 그 목록은 시간 인덱스와 같은 디렉터리에 둔다
+BLOCKS_SUFFIX = '.blocks'
+BLOCK_INDEX_SUFFIX = '.blocks.json'
+BLOCK_BYTES = 1024 * 1024
+# 블록 캐시 전체 크기 상한. 넘으면 가장 오래 안 쓴 것부터 지운다. 원본 압축 파일이 지워진 캐시는 항상 지운다
+BLOCK_CACHE_MAX_BYTES = int(os.getenv('LOG_BLOCK_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+SEQUENCE_PATTERN = re.compile(r'(\d+)\.log')
+
+
+def log_directories(start_datetime: datetime, end_datetime: datetime, root=LOG_ROOT) -> list:
+    date_list = []
+    current_date = start_datetime.date()
+    while current_date <= end_datetime.date():
+        date_list.append(current_date.strftime('%Y-%m-%d'))
+        current_date += timedelta(days=1)
+    return [os.path.join(root, date_str) + '/' for date_str in date_list]
+
+
+def iter_log_files(start_datetime: datetime, end_datetime: datetime, root=LOG_ROOT):
+    for directory in log_directories(start_datetime, end_datetime, root):
+        if not os.path.exists(directory):
+            continue
+
+        for filename in sorted_log_files(os.listdir(directory)):
+            yield os.path.join(directory, filename)
+
+
+def is_compressed(filepath) -> bool:
+    return filepath.endswith(COMPRESSED_SUFFIXES)
+
+
+def uncompressed_path(filepath) -> str:
+    for suffix in COMPRESSED_SUFFIXES:
+        if filepath.endswith(suffix):
+            return filepath[:-len(suffix)]
+    return filepath
+
+
+def rotation_key(filename):
+    # 10.log 이 2.log 뒤에 오도록 회전 번호는 숫자로 비교하고, 같은 번호면 원본이 먼저 온다
+    match = SEQUENCE_PATTERN.match(filename)
+    if match is None:
+        return 1, 0, filename
+    return 0, int(match.group(1)), filename
+
+
+def sorted_log_files(filenames) -> list:
+    # 압축하는 중이라 원본과 압축본이 같이 있으면 아직 덜 쓰인 압축본은 건너뛴다
+    names = set(filenames)
+    log_files = [filename for filename in names if filename.endswith(LOG_FILE_SUFFIXES)
+                 and not (is_compressed(filename) and uncompressed_path(filename) in names)]
+    return sorted(log_files, key=rotation_key)
+
+
+def open_log(filepath):
+    if filepath.endswith(GZIP_SUFFIX):
+        return gzip.open(filepath, 'rb')
+    if filepath.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard 패키지가 없어 압축 로그를 읽을 수 없습니다: {filepath}")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+        return io.BufferedReader(reader)
+    return open(filepath, 'rb')
+
+
+def open_text_log(filepath):
+    # 병렬 스캔과 같은 줄 단위가 되도록 '\n' 으로만 나누고 깨진 바이트는 대체한다
+    if is_compressed(filepath):
+        return io.TextIOWrapper(open_log(filepath), encoding='utf-8', errors='replace', newline='\n')
+    return open(filepath, 'r', encoding='utf-8', errors='replace', newline='\n')
+
+
+def iter_file_lines(filepath, offset=0):
+    try:
+        with open_text_log(filepath) as file:
+            # 압축 파일은 위치 이동이 안 되니 항상 처음부터 푼다
+            if offset and not is_compressed(filepath):
+                file.seek(offset)
+            yield from file
+    except Exception as e:
+        print(f"파일 열기 실패: {filepath}, 에러: {e}")
+
+
+def iter_lines_after(filepath, offset=0):
+    # 압축 전 원본에서 offset 까지 이미 읽었을 때 나머지 줄만 (끝 위치, 줄) 로 돌려준다
+    # 읽기 실패는 호출한 쪽이 처리해서 반쯤 읽은 결과를 저장하지 않도록 한다
+    end = 0
+    with open_log(filepath) as file:
+        for raw in file:
+            end += len(raw)
+            if end > offset:
+                yield end, raw.decode('utf-8', errors='replace')
+
+
+def load_blocks(filepath):
+    # 압축 파일을 한 번 풀 때 따로 압축해 둔 블록들. 블록마다 시각 범위가 있어 창에 걸친 블록만 푼다
+    try:
+        stat = os.stat(filepath)
+        with open(index_path_for(filepath, suffix=BLOCK_INDEX_SUFFIX), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        blocks_size = os.path.getsize(index_path_for(filepath, suffix=BLOCKS_SUFFIX))
+    except (OSError, ValueError):
+        return None
+    if data.get('inode') != stat.st_ino or data.get('size') != stat.st_size or data.get('blocks_size') != blocks_size:
+        return None
+    try:
+        # 캐시를 정리할 때 가장 오래 안 쓴 것을 고르는 기준
+        os.utime(index_path_for(filepath, suffix=BLOCK_INDEX_SUFFIX))
+    except OSError:
+        pass
+    return data['blocks']
+
+
+def iter_compressed_lines(filepath, window, markers=None):
+    blocks = load_blocks(filepath)
+    if blocks is None:
+        yield from _build_blocks(filepath, window, markers)
+        return
+    try:
+        with open(index_path_for(filepath, suffix=BLOCKS_SUFFIX), 'rb') as file:
+            for offset, length, first, last in blocks:
+                if first is None or not window.overlaps(first, last):
+                    continue
+                file.seek(offset)
+                text = zlib.decompress(file.read(length)).decode('utf-8', errors='replace')
+                for line in io.StringIO(text, newline='\n'):
+                    if window.contains(line) and (markers is None or any(marker in line for marker in markers)):
+                        yield line
+    except Exception as e:
+        print(f"압축 로그 블록 읽기 실패: {filepath}, 에러: {e}")
+
+
+def _build_blocks(filepath, window, markers=None):
+    # 처음 읽을 때는 끝까지 풀면서 줄을 돌려주고, 같은 내용을 블록 단위로 다시 압축해 저장한다
+    blocks_path = index_path_for(filepath, suffix=BLOCKS_SUFFIX)
+    tmp_path = None
+    stat = os.stat(filepath)
+    blocks = []
+    chunk, chunk_size, first, last = [], 0, None, None
+    output = None
+    try:
+        directory = os.path.dirname(blocks_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # 보고서와 롤업이 같은 파일을 동시에 풀어도 서로의 임시 파일을 덮어쓰지 않게 이름을 따로 받는다
+        output = tempfile.NamedTemporaryFile(dir=directory, prefix=os.path.basename(blocks_path) + '.',
+                                             suffix='.tmp', delete=False)
+        tmp_path = output.name
+    except OSError as e:
+        print(f"압축 로그 블록 저장 실패: {blocks_path}, 에러: {e}")
+
+    def write_chunk():
+        data = zlib.compress(''.join(chunk).encode('utf-8'))
+        blocks.append([output.tell(), len(data), first, last])
+        output.write(data)
+
+    try:
+        with open_text_log(filepath) as file:
+            for line in file:
+                if has_timestamp(line):
+                    timestamp = line[:TIMESTAMP_LENGTH]
+                    if first is None or timestamp < first:
+                        first = timestamp
+                    if last is None or timestamp > last:
+                        last = timestamp
+                if window.contains(line) and (markers is None or any(marker in line for marker in markers)):
+                    yield line
+                if output is None:
+                    continue
+                chunk.append(line)
+                chunk_size += len(line)
+                if chunk_size >= BLOCK_BYTES:
+                    write_chunk()
+                    chunk, chunk_size, first, last = [], 0, None, None
+        if output is not None:
+            if chunk:
+                write_chunk()
+            output.close()
+            os.replace(tmp_path, blocks_path)
+            _save_block_index(filepath, stat, blocks, os.path.getsize(blocks_path))
+            prune_block_cache(os.path.dirname(blocks_path) or '.')
+    except Exception as e:
+        print(f"파일 열기 실패: {filepath}, 에러: {e}")
+    finally:
+        # 중간에 멈추면 (예외, 읽는 쪽이 그만 읽음) 반쯤 만든 블록은 버린다
+        if output is not None and not output.closed:
+            output.close()
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _save_block_index(filepath, stat, blocks, blocks_size):
+    index_path = index_path_for(filepath, suffix=BLOCK_INDEX_SUFFIX)
+    data = {'path': os.path.abspath(filepath), 'inode': stat.st_ino, 'size': stat.st_size,
+            'blocks_size': blocks_size, 'blocks': blocks}
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(index_path) or '.',
+                                         prefix=os.path.basename(index_path) + '.', suffix='.tmp', delete=False) as f:
+            json.dump(data, f)
+        os.replace(f.name, index_path)
+    except OSError as e:
+        print(f"압축 로그 블록 목록 저장 실패: {index_path}, 에러: {e}")
+
+
+def prune_block_cache(directory, max_bytes=BLOCK_CACHE_MAX_BYTES):
+    # 원본이 지워졌거나 바뀐 캐시를 지우고, 남은 것이 상한을 넘으면 가장 오래 안 쓴 것부터 지운다
+    caches = []
+    for name in os.listdir(directory):
+        if not name.endswith(BLOCK_INDEX_SUFFIX):
+            continue
+        index_path = os.path.join(directory, name)
+        blocks_path = index_path[:-len(BLOCK_INDEX_SUFFIX)] + BLOCKS_SUFFIX
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            used_at = os.path.getmtime(index_path)
+            size = os.path.getsize(blocks_path)
+        except (OSError, ValueError):
+            continue
+        try:
+            stale = os.stat(data['path']).st_ino != data.get('inode')
+        except (KeyError, OSError):
+            stale = True
+        if stale:
+            _remove_block_cache(index_path, blocks_path)
+        else:
+            caches.append((used_at, size, index_path, blocks_path))
+    total = sum(size for used_at, size, index_path, blocks_path in caches)
+    for used_at, size, index_path, blocks_path in sorted(caches):
+        if total <= max_bytes:
+            break
+        _remove_block_cache(index_path, blocks_path)
+        total -= size
+
+
+def _remove_block_cache(index_path, blocks_path):
+    for path in (index_path, blocks_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def iter_mmap_lines(filepath, window, offset=0, markers=None):
+    # 시각 비교와 이벤트 표식 검색을 바이트에서 끝내고 남길 줄만 디코딩한다
+    try:
+        with open(filepath, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size <= offset:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if markers is not None:
+                    for start, end in _iter_marker_line_spans(mapped, offset, size, markers):
+                        if window.contains_bytes(mapped, start):
+                            yield mapped[start:end].decode('utf-8', errors='replace')
+                    return
+
+                position = offset
+                while position < size:
+                    end = mapped.find(b'\n', position, size)
+                    end = size if end < 0 else end + 1
+                    if window.contains_bytes(mapped, position):
+                        yield mapped[position:end].decode('utf-8', errors='replace')
+                    position = end
+    except Exception as e:
+        print(f"파일 열기 실패: {filepath}, 에러: {e}")
+
+
+def _iter_marker_line_spans(mapped, position, size, markers):
+    # 표식이 나오는 위치로 바로 건너뛰고 그 줄의 시작과 끝만 찾는다
+    hits = {marker: mapped.find(marker, position, size) for marker in markers}
+    while True:
+        found = [hit for hit in hits.values() if hit >= 0]
+        if not found:
+            return
+        hit = min(found)
+        start = mapped.rfind(b'\n', position, hit) + 1 or position
+        end = mapped.find(b'\n', hit, size)
+        end = size if end < 0 else end + 1
+        yield start, end
+        position = end
+        for marker, marker_hit in hits.items():
+            if 0 <= marker_hit < position:
+                hits[marker] = mapped.find(marker, position, size)
+
+
+def start_offset(filepath, start_datetime: datetime, tolerance=INDEX_TOLERANCE) -> int:
+    if is_compressed(filepath):
+        return 0
+    try:
+        return TimeIndex(filepath).seek_offset(start_datetime, tolerance)
+    except Exception as e:
+        print(f"시간 인덱스 사용 실패: {filepath}, 에러: {e}")
+        return 0
+
+
+def iter_lines_between(start_datetime: datetime, end_datetime: datetime = None, root=LOG_ROOT,
+                       use_index=True, tolerance=INDEX_TOLERANCE, engine=READER_ENGINE, markers=None):
+    # 파일 -> 시간 필터 순서로 한 줄씩 흘려보내서 메모리 사용량이 로그 크기와 무관하다
+    # markers 가 있으면 그중 하나를 포함한 줄만 남긴다
+    if engine not in (TEXT_ENGINE, MMAP_ENGINE):
+        raise ValueError(f"지원하지 않는 로그 읽기 방식입니다: {engine}")
+    window = TimeWindow(start_datetime, end_datetime)
+    for filepath in iter_log_files(start_datetime, end_datetime or datetime.now(), root):
+        if is_compressed(filepath):
+            for line in iter_compressed_lines(filepath, window, markers):
+                yield line.strip()
+            continue
+        offset = start_offset(filepath, start_datetime, tolerance) if use_index else 0
+        if engine == MMAP_ENGINE:
+            byte_markers = None if markers is None else [marker.encode('utf-8') for marker in markers]
+            for line in iter_mmap_lines(filepath, window, offset, byte_markers):
+                yield line.strip()
+        else:
+            for line in iter_file_lines(filepath, offset):
+                if window.contains(line) and (markers is None or any(marker in line for marker in markers)):
+                    yield line.strip()
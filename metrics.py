@@ -0,0 +1,103 @@
+import threading
+
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from latency import LatencyHistogram
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+SUMMARY = 'summary'
+QUANTILES = (0.5, 0.9, 0.99)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # (이름, 레이블) -> 값. 처리 스레드에서는 더하기만 하고 문자열은 가져갈 때 만든다
+        self.counters = defaultdict(int)
+        self.histograms = dict()
+        self._help = dict()
+        # 가져갈 때마다 부르는 함수. (이름, 종류, 레이블, 값) 을 돌려준다
+        self._collectors = []
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value_ms, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.add(value_ms)
+
+    def register(self, collector):
+        self._collectors.append(collector)
+
+    def samples(self):
+        for (name, labels), value in list(self.counters.items()):
+            yield name, COUNTER, dict(labels), value
+        for (name, labels), histogram in list(self.histograms.items()):
+            yield name, SUMMARY, dict(labels), histogram
+        for collector in self._collectors:
+            try:
+                yield from collector()
+            except Exception as e:
+                print(f"지표 수집 실패: {collector}, 에러: {e}")
+
+    def render(self) -> str:
+        # Prometheus 텍스트 형식. 히스토그램은 분위수를 가진 summary 로 내보낸다
+        lines = []
+        described = set()
+        for name, kind, labels, value in sorted(self.samples(), key=lambda sample: sample[0]):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+            if kind == SUMMARY:
+                for q in QUANTILES:
+                    quantile = value.quantile(q)
+                    lines.append(f"{name}{_labels({**labels, 'quantile': q})} {quantile if quantile is not None else 'NaN'}")
+                lines.append(f"{name}_sum{_labels(labels)} {value.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {value.count}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return '{' + pairs + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def start_metrics_server(registry, port, host='127.0.0.1'):
+    # 로컬에서만 긁어 가는 용도라 표준 라이브러리 서버로 충분하다
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
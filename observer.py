@@ -1,13 +1,28 @@
 import json
+import signal
+import threading
 import time
-import pytz
 import os
-import requests
+
+from collections import deque
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from dotenv import load_dotenv
 
+from checkpoint import CheckpointStore
+from dedupe import EventDeduper
+from dispatcher import Dispatcher
+from fingerprint import MAX_FINGERPRINTS, SUMMARY_INTERVAL_SECONDS, WINDOW_SECONDS, ErrorStormGuard
+from live import STATS_BUCKET_SECONDS, STATS_WINDOW_SECONDS, AlertRule, LiveStats
+from logreader import COMPRESSED_SUFFIXES, LOG_FILE_SUFFIXES, is_compressed, iter_lines_after, sorted_log_files, uncompressed_path
+from metrics import COUNTER, GAUGE, SUMMARY, MetricsRegistry, start_metrics_server
+from scheduler import COALESCE_SECONDS, POLL_INTERVAL_SECONDS, EventScheduler
+from sinks import FLUSH_INTERVAL_SECONDS, FSYNC_NEVER, FileWriterPool, SentLedger, SlackSink
+from slack import SlackDelivery
+from templates import KstClock, MessageTemplate, to_blocks
+from tailer import LogTailer
+
 load_dotenv()
 ENVIRONMENT = os.getenv('ENVIRONMENT')
 SLACK_TOKEN = os.getenv('SLACK_TOKEN')
@@ -18,7 +33,21 @@ SLACK_LOG_CHANNEL = os.getenv('SLACK_LOG_CHANNEL')
 TICKET_PRICE_REGISTERED_POLICY = os.getenv('TICKET_PRICE_REGISTERED_POLICY')
 TICKET_PRICE_POLICY = os.getenv('TICKET_PRICE_POLICY')
 
-SLACK_WEBHOOK_URL = 'https://slack.com/api/chat.postMessage'
+SLACK_WEBHOOK_URL = os.getenv('SLACK_WEBHOOK_URL', 'https://slack.com/api/chat.postMessage')
+SLACK_COALESCE_SECONDS = float(os.getenv('SLACK_COALESCE_SECONDS', '0'))
+# 켜면 알림 채널 메시지를 Block Kit 으로 보낸다. text 는 알림 미리보기용으로 같이 간다
+SLACK_BLOCK_KIT = os.getenv('SLACK_BLOCK_KIT', 'false').lower() == 'true'
+
+slack = SlackDelivery(SLACK_TOKEN, SLACK_WEBHOOK_URL, coalesce_window=SLACK_COALESCE_SECONDS)
+# createProfiles.txt 같은 기록은 모아서 쓰고, 전용 스레드가 주기적으로 그리고 종료 시에 비운다
+FILE_SINK_FLUSH_SECONDS = float(os.getenv('FILE_SINK_FLUSH_SECONDS', str(FLUSH_INTERVAL_SECONDS)))
+FILE_SINK_FSYNC = os.getenv('FILE_SINK_FSYNC', FSYNC_NEVER)
+FILE_SINK_MAX_BYTES = int(os.getenv('FILE_SINK_MAX_BYTES', '0')) or None
+FILE_SINK_JSONL_PATH = os.getenv('FILE_SINK_JSONL_PATH')
+file_writers = FileWriterPool(FILE_SINK_JSONL_PATH, flush_interval=FILE_SINK_FLUSH_SECONDS, fsync=FILE_SINK_FSYNC,
+                              max_bytes=FILE_SINK_MAX_BYTES)
+# 핸들러의 모든 출력은 sink 를 거친다. 재처리할 때는 다른 sink 로 바꿔 끼운다
+sink = SlackSink(slack, files=file_writers)
 
 SERVER_RESTART = 'INFO org.springframework.boot.web.embedded.tomcat.TomcatWebServer - Tomcat started on port'
 INTERNAL_ERROR_LOG_PREFIX = 'ERROR com.yourssu.signal.handler.InternalServerErrorControllerAdvice -'
@@ -44,128 +73,159 @@ ticket_policy_message = f"- 💰 현재 가격 정책: {to_ticket_price_message(
 ticket_registered_message = f"- 🌱 프로필 등록 완료 첫 구매 고객: {to_ticket_price_message(TICKET_PRICE_REGISTERED_POLICY)}"
 
 
+# 핸들러 메시지는 시작할 때 한 번 만들어 두고, 알림마다 바뀌는 값만 채운다
+kst_clock = KstClock()
+STATIC_VALUES = {
+    'environment': ENVIRONMENT.upper(),
+    'ticket_policy_message': ticket_policy_message,
+    'ticket_registered_message': ticket_registered_message,
+}
+SERVER_RESTART_TEMPLATE = MessageTemplate(
+    "🟢 {environment} SERVER RESTARTED - 시그널 API \n\n{ticket_policy_message}\n \n{ticket_registered_message}", **STATIC_VALUES)
+PROFILE_TEMPLATE = MessageTemplate("""🩷 *프로필 등록 완료* 🩷
+    -  💖 *식별 번호*: {id}
+    -  🏢 *학과*: {department}
+    -  📞 *연락처*: https://www.instagram.com/{contact}
+    -  👤 *닉네임*: {nickname}
+    -  📝 *자기소개*: {introSentences}
+    """)
+FAILED_PROFILE_CONTACT_TEMPLATE = MessageTemplate("""🚨🚨 같은 연락처 등록 실패 - {environment} SERVER 🚨🚨
+    - ⚔️ 중복 연락처 제한 기준: {contact_policy} 개
+    """, **STATIC_VALUES)
+CONTACT_EXCEEDS_WARNING_TEMPLATE = MessageTemplate("""🚨 같은 연락처 등록 경고 - {environment} SERVER 🚨
+    - ⚔️ 중복 연락처 경고 기준: {contact_policy} 개
+    """, **STATIC_VALUES)
+TICKET_GUIDE = """
+    *이용권 발급 방법 안내*
+    *자동 발급*
+        - 🎁 계좌번호: 카카오뱅크 79421782258
+        - 💌 받는 분 통장 표시: {verification}
+        {ticket_policy_message}
+        {ticket_registered_message}
+
+    *수동 발급*
+    `/t {verification} <개수>`
+    입금 확인 후 이용권을 발급해주세요!
+    """
+ISSUED_TICKET_TEMPLATE = MessageTemplate("""🩷 *이용권 발급 완료* 🩷
+
+    -  💖 *인증 번호*: {verification}
+    -  😀 *식별 번호*: {uuid}
+    -  🎁 *발급한 이용권*: {ticket}장
+    -  💝 *보유 이용권*: {available_ticket}장
+    -  💌 *발급 시간*: {now} KST
+""" + TICKET_GUIDE, **STATIC_VALUES)
+RETRY_ISSUED_TICKET_TEMPLATE = MessageTemplate("""💌 *결제 확인 요청 이용권 발급 완료* 💌
+    -  💌 *받는 분 통장 표시*: {name}
+    -  💖 *인증 번호*: {verification}
+    -  😀 *식별 번호*: {uuid}
+    -  🎁 *발급한 이용권*: {ticket}장
+    -  💝 *보유 이용권*: {available_ticket}장
+    -  💌 *발급 시간*: {now} KST
+""" + TICKET_GUIDE, **STATIC_VALUES)
+CONSUMED_TICKET_TEMPLATE = MessageTemplate("""🩷 *누군가 {nickname}님께 시그널을 보냈어요.* 🩷
+    -  💌 *보낸 시간*: {now} KST
+    """)
+ISSUE_TICKET_TEMPLATE = MessageTemplate("""💰 *입금 확인 완료* 💰
+        -  💌 *받는 분 통장 표시*: {name}
+        -  💰 *금액*: {deposit_amount}원
+        -  ⏰ *시간*: {now} KST
+        """)
+FAILED_ISSUE_TICKET_AMOUNT_TEMPLATE = MessageTemplate("""🚨 *이용권 발급 실패* 🚨
+    💌 입금금액에 해당하는 티켓 가격 정보가 없습니다.
+    -  💌 *받는 분 통장 표시*: {name}
+    -  💰 *금액*: {deposit_amount}원
+    -  ⏰ *시간*: {now} KST
+    {ticket_policy_message}
+    {ticket_registered_message}
+    """, **STATIC_VALUES)
+FAILED_ISSUE_TICKET_VERIFICATION_TEMPLATE = MessageTemplate("""🚨 *이용권 발급 실패* 🚨
+    💌 받는 분 통장 표시에 해당하는 인증번호가 없습니다.
+    -  💌 *받는 분 통장 표시*: {name}
+    -  💰 *금액*: {deposit_amount}원
+    -  ⏰ *시간*: {now} KST
+    """)
+PAY_NOTIFICATION_TEMPLATE = MessageTemplate("""🚨🚨 *결제 확인 요청이 접수되었습니다.* 🚨🚨
+        -  💌 *받는 분 통장 표시*: {name}
+        -  💖 *인증 번호*: {verification}
+        -  ⏰ *시간*: {now} KST
+        """)
+NO_FIRST_PURCHASED_TICKET_TEMPLATE = MessageTemplate("""🚨 *현장 확인 필요! 프로필을 등록하지 않거나 첫번째 구매가 아닌 사용자입니다.* 🚨
+        -  💌 *받는 분 통장 표시*: {name}
+        -  💰 *금액*: {deposit_amount}
+        -  ⏰ *시간*: {now} KST
+        """)
+
+
 def create_server_restart_message(line):
-    message = f"🟢 {ENVIRONMENT.upper()} SERVER RESTARTED - 시그널 API \n\n{ticket_policy_message}\n \n{ticket_registered_message}"
-    send_slack_notification(message)
+    send_slack_notification(SERVER_RESTART_TEMPLATE.render())
+
+
+ERROR_STORM_WINDOW_SECONDS = int(os.getenv('ERROR_STORM_WINDOW_SECONDS', str(WINDOW_SECONDS)))
+ERROR_SUMMARY_SECONDS = float(os.getenv('ERROR_SUMMARY_SECONDS', str(SUMMARY_INTERVAL_SECONDS)))
+# 같은 오류가 쏟아질 때 첫 건만 바로 보내고 나머지는 주기적으로 묶어서 알린다
+error_guard = ErrorStormGuard(ERROR_STORM_WINDOW_SECONDS, ERROR_SUMMARY_SECONDS, MAX_FINGERPRINTS)
+# 줄 -> epoch 초. 지난 로그를 다시 처리할 때는 벽시계 대신 줄의 시각으로 폭주를 판단한다
+error_clock = None
 
 
 def create_internal_error_message(line):
+    now = error_clock(line) if error_clock is not None else None
+    if not error_guard.record(line.partition(INTERNAL_ERROR_LOG_PREFIX)[2], now):
+        # 요약으로 묶여 보내지 않은 줄이라 dispatch 가 전송 기록에 남기지 않는다
+        return False
     message = f"🚨ALERT ERROR - {ENVIRONMENT.upper()} SERVER🚨\n{line.replace(INTERNAL_ERROR_LOG_PREFIX, '')}"
     send_slack_log_notification(message)
 
 
+def send_error_summaries(now=None):
+    for sample, count, minutes in error_guard.due_summaries(now):
+        message = f"🚨ALERT ERROR - {ENVIRONMENT.upper()} SERVER🚨\n같은 오류가 최근 {minutes}분 동안 {count}건 더 발생했습니다\n{sample.strip()}"
+        send_slack_log_notification(message)
+
+
 def send_slack_log_notification(message):
-    payload = {
-        'channel': SLACK_LOG_CHANNEL,
-        'text': message
-    }
-    headers = {
-        'Authorization': f'Bearer {SLACK_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    log = requests.post(SLACK_WEBHOOK_URL, json=payload, headers=headers)
-    print(log.text)
+    sink.send(SLACK_LOG_CHANNEL, message)
 
 
 def send_slack_admin_notification(message):
-    payload = {
-        'channel': SLACK_ADMIN_CHANNEL,
-        'text': message
-    }
-    headers = {
-        'Authorization': f'Bearer {SLACK_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    log = requests.post(SLACK_WEBHOOK_URL, json=payload, headers=headers)
-    print(log.text)
+    sink.send(SLACK_ADMIN_CHANNEL, message)
 
 
 def create_profile_message(line):
     id, department, contact, nickname, introSentences = line[line.find('&') + 1:].split('&')
-    message = f"""🩷 *프로필 등록 완료* 🩷
-    -  💖 *식별 번호*: {id}
-    -  🏢 *학과*: {department}
-    -  📞 *연락처*: https://www.instagram.com/{contact.replace('@', '')}
-    -  👤 *닉네임*: {nickname}
-    -  📝 *자기소개*: {introSentences}
-    """
+    message = PROFILE_TEMPLATE.render(id=id, department=department, contact=contact.replace('@', ''),
+                                      nickname=nickname, introSentences=introSentences)
     append_or_create_file("/home/ubuntu/signal-api/createProfiles.txt", message)
 #    send_slack_admin_notification(message)
 
 
 def create_failed_profile_contact_message(line):
     contact_policy = line[line.find('&') + 1:].strip()
-    message = f"""🚨🚨 같은 연락처 등록 실패 - {ENVIRONMENT.upper()} SERVER 🚨🚨
-    - ⚔️ 중복 연락처 제한 기준: {contact_policy} 개
-    """
+    message = FAILED_PROFILE_CONTACT_TEMPLATE.render(contact_policy=contact_policy)
     append_or_create_file("/home/ubuntu/signal-api/createProfiles.txt", message)
     send_slack_log_notification(message)
 
 
 def create_contact_exceeds_warning_message(line):
     contact_policy = line[line.find('&') + 1:].strip()
-    message = f"""🚨 같은 연락처 등록 경고 - {ENVIRONMENT.upper()} SERVER 🚨
-    - ⚔️ 중복 연락처 경고 기준: {contact_policy} 개
-    """
+    message = CONTACT_EXCEEDS_WARNING_TEMPLATE.render(contact_policy=contact_policy)
     append_or_create_file("/home/ubuntu/signal-api/createProfiles.txt", message)
     send_slack_log_notification(message)
 
 
 def create_issued_ticket_message(line):
     verification, uuid, ticket, available_ticket = line[line.find('&') + 1:].split(' ')
-
-    # 한국 시간대 설정
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-
-    message = f"""🩷 *이용권 발급 완료* 🩷
-
-    -  💖 *인증 번호*: {str(verification).zfill(4)}
-    -  😀 *식별 번호*: {uuid}
-    -  🎁 *발급한 이용권*: {int(ticket)}장
-    -  💝 *보유 이용권*: {int(available_ticket)}장
-    -  💌 *발급 시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-
-    *이용권 발급 방법 안내*
-    *자동 발급*
-        - 🎁 계좌번호: 카카오뱅크 79421782258
-        - 💌 받는 분 통장 표시: {str(verification).zfill(4)}
-        {ticket_policy_message}
-        {ticket_registered_message}
-
-    *수동 발급*
-    `/t {str(verification).zfill(4)} <개수>`
-    입금 확인 후 이용권을 발급해주세요!
-    """
+    message = ISSUED_TICKET_TEMPLATE.render(verification=str(verification).zfill(4), uuid=uuid, ticket=int(ticket),
+                                            available_ticket=int(available_ticket), now=kst_clock.now())
     send_slack_notification(message)
 
 
 def create_retry_issued_ticket_message(line):
     verification, uuid, ticket, available_ticket, name = line[line.find('&') + 1:].split(' ')
-
-    # 한국 시간대 설정
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-
-    message = f"""💌 *결제 확인 요청 이용권 발급 완료* 💌
-    -  💌 *받는 분 통장 표시*: {name}
-    -  💖 *인증 번호*: {str(verification).zfill(4)}
-    -  😀 *식별 번호*: {uuid}
-    -  🎁 *발급한 이용권*: {int(ticket)}장
-    -  💝 *보유 이용권*: {int(available_ticket)}장
-    -  💌 *발급 시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-
-    *이용권 발급 방법 안내*
-    *자동 발급*
-        - 🎁 계좌번호: 카카오뱅크 79421782258
-        - 💌 받는 분 통장 표시: {str(verification).zfill(4)}
-        {ticket_policy_message}
-        {ticket_registered_message}
-
-    *수동 발급*
-    `/t {str(verification).zfill(4)} <개수>`
-    입금 확인 후 이용권을 발급해주세요!
-    """
+    message = RETRY_ISSUED_TICKET_TEMPLATE.render(name=name, verification=str(verification).zfill(4), uuid=uuid,
+                                                  ticket=int(ticket), available_ticket=int(available_ticket),
+                                                  now=kst_clock.now())
     send_slack_notification(message)
 
 
@@ -173,81 +233,36 @@ def create_consumed_ticket_message(line):
     nickname, ticket = line[line.find('&') + 1:].split(' ')
     if ticket == '0':
         return
-
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-    message = f"""🩷 *누군가 {nickname}님께 시그널을 보냈어요.* 🩷
-    -  💌 *보낸 시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-    """
-    send_slack_notification(message)
+    send_slack_notification(CONSUMED_TICKET_TEMPLATE.render(nickname=nickname, now=kst_clock.now()))
 
 
 def create_issue_ticket_message(line):
     name, deposit_amount = line[line.find('&') + 1:].split(' ')
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-    message = f"""💰 *입금 확인 완료* 💰
-        -  💌 *받는 분 통장 표시*: {name}
-        -  💰 *금액*: {deposit_amount.strip()}원
-        -  ⏰ *시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-        """
-    send_slack_notification(message)
+    send_slack_notification(ISSUE_TICKET_TEMPLATE.render(name=name, deposit_amount=deposit_amount.strip(),
+                                                         now=kst_clock.now()))
 
 
 def create_failed_issue_ticket_message_amount(line):
     name, depositAmount = line[line.find('&') + 1:].split(' ')
-
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-    message = f"""🚨 *이용권 발급 실패* 🚨
-    💌 입금금액에 해당하는 티켓 가격 정보가 없습니다.
-    -  💌 *받는 분 통장 표시*: {name}
-    -  💰 *금액*: {depositAmount.strip()}원
-    -  ⏰ *시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-    {ticket_policy_message}
-    {ticket_registered_message}
-    """
-    send_slack_notification(message)
+    send_slack_notification(FAILED_ISSUE_TICKET_AMOUNT_TEMPLATE.render(name=name, deposit_amount=depositAmount.strip(),
+                                                                       now=kst_clock.now()))
 
 
 def create_failed_issue_ticket_message_verification(line):
     name, depositAmount = line[line.find('&') + 1:].split(' ')
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-
-    message = f"""🚨 *이용권 발급 실패* 🚨
-    💌 받는 분 통장 표시에 해당하는 인증번호가 없습니다.
-    -  💌 *받는 분 통장 표시*: {name}
-    -  💰 *금액*: {depositAmount.strip()}원
-    -  ⏰ *시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-    """
-    send_slack_notification(message)
+    send_slack_notification(FAILED_ISSUE_TICKET_VERIFICATION_TEMPLATE.render(
+        name=name, deposit_amount=depositAmount.strip(), now=kst_clock.now()))
 
 
 def create_pay_notification_message(line):
     name, verification = line[line.find('&') + 1:].split(' ')
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-
-    message = f"""🚨🚨 *결제 확인 요청이 접수되었습니다.* 🚨🚨
-        -  💌 *받는 분 통장 표시*: {name}
-        -  💖 *인증 번호*: {verification}
-        -  ⏰ *시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-        """
-    send_slack_notification(message)
+    send_slack_notification(PAY_NOTIFICATION_TEMPLATE.render(name=name, verification=verification, now=kst_clock.now()))
 
 
 def create_no_first_purchased_ticket_message(line):
     name, depositAmount = line[line.find('&') + 1:].split(' ')
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(pytz.utc).astimezone(kst)
-
-    message = f"""🚨 *현장 확인 필요! 프로필을 등록하지 않거나 첫번째 구매가 아닌 사용자입니다.* 🚨
-        -  💌 *받는 분 통장 표시*: {name}
-        -  💰 *금액*: {depositAmount}
-        -  ⏰ *시간*: {now_kst.strftime('%Y-%m-%d %H:%M:%S')} KST
-        """
-    send_slack_notification(message)
+    send_slack_notification(NO_FIRST_PURCHASED_TICKET_TEMPLATE.render(name=name, deposit_amount=depositAmount,
+                                                                      now=kst_clock.now()))
 
 
 handler = {
@@ -265,73 +280,411 @@ handler = {
     PAY_NOTIFICATION_PREFIX: create_pay_notification_message,
     NO_FIRST_PURCHASED_TICKET_PREFIX: create_no_first_purchased_ticket_message
 }
+dispatcher = Dispatcher(handler)
 
 
 def send_slack_notification(message):
-    payload = {
-        'channel': SLACK_CHANNEL,
-        'text': message
-    }
-    headers = {
-        'Authorization': f'Bearer {SLACK_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-    log = requests.post(SLACK_WEBHOOK_URL, json=payload, headers=headers)
-    print(log.text)
+    sink.send(SLACK_CHANNEL, message, to_blocks(message) if SLACK_BLOCK_KIT else None)
 
 
 def append_or_create_file(filename, content):
-    with open(filename, 'a', encoding='utf-8') as f:
-        f.write(content)
+    sink.append(filename, content)
+
+
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'observer_checkpoint.json')
+
+checkpoints = CheckpointStore(CHECKPOINT_PATH)
+tailers = dict()
+# (sink 진행 표시, 파일, inode, offset, 시각). 그 전까지 넣은 알림이 나간 뒤에야 체크포인트로 옮긴다
+pending_checkpoints = deque()
+# 실시간 감시와 replay.py 가 함께 쓰는 전송 기록. 감시를 시작할 때 파일을 연다
+SENT_LEDGER_PATH = os.getenv('SENT_LEDGER_PATH', 'sent_ledger.txt')
+ledger = SentLedger()
+# SIGTERM 을 받으면 남은 알림을 최대 이만큼 기다려 보낸다
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv('SHUTDOWN_DRAIN_SECONDS', '30'))
+
+# 0 이면 지표 HTTP 서버를 띄우지 않는다
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_SUMMARY_SECONDS = float(os.getenv('METRICS_SUMMARY_SECONDS', '3600'))
+LINES_READ_METRIC = 'observer_lines_read_total'
+EVENTS_METRIC = 'observer_events_total'
+DUPLICATES_METRIC = 'observer_duplicate_events_total'
+HANDLER_ERRORS_METRIC = 'observer_handler_errors_total'
+
+metrics = MetricsRegistry()
+metrics.describe(LINES_READ_METRIC, '읽은 로그 줄 수')
+metrics.describe(EVENTS_METRIC, '핸들러별로 처리한 이벤트 수')
+metrics.describe(HANDLER_ERRORS_METRIC, '핸들러에서 난 예외 수')
+metrics.describe(DUPLICATES_METRIC, '두 번 기록되어 건너뛴 이벤트 수')
+# 같은 이벤트가 다시 찍히거나 압축본과 원본에서 두 번 읽혀도 알림은 한 번만 보낸다
+deduper = EventDeduper()
+# 파일 -> 마지막으로 끝까지 읽은 시각
+last_read_at = dict()
+
+LIVE_WINDOW_SECONDS = int(os.getenv('LIVE_WINDOW_SECONDS', str(STATS_WINDOW_SECONDS)))
+LIVE_BUCKET_SECONDS = int(os.getenv('LIVE_BUCKET_SECONDS', str(STATS_BUCKET_SECONDS)))
+# 최근 창에서 요청이 이만큼 이상일 때만 5xx 비율을 본다. 한두 건의 실패로 알리지 않는다
+ERROR_RATE_THRESHOLD = float(os.getenv('ERROR_RATE_THRESHOLD', '0.05'))
+ERROR_RATE_MIN_REQUESTS = int(os.getenv('ERROR_RATE_MIN_REQUESTS', '20'))
+# 0 이면 요청이 끊겨도 알리지 않는다
+ZERO_TRAFFIC_MINUTES = float(os.getenv('ZERO_TRAFFIC_MINUTES', '30'))
+PROFILES_EVENT = 'profiles'
+TICKETS_ISSUED_EVENT = 'tickets_issued'
+TICKETS_CONSUMED_EVENT = 'tickets_consumed'
+LIVE_EVENTS = {
+    create_profile_message: PROFILES_EVENT,
+    create_issued_ticket_message: TICKETS_ISSUED_EVENT,
+    create_retry_issued_ticket_message: TICKETS_ISSUED_EVENT,
+}
+# 핸들러는 없지만 실시간 지표에서는 세는 줄
+LIVE_PREFIXES = {
+    CONSUME_TICKET_PREFIX: TICKETS_CONSUMED_EVENT,
+}
+live = LiveStats(LIVE_WINDOW_SECONDS, LIVE_BUCKET_SECONDS)
+live_started_at = time.time()
+
+
+def error_rate_condition(now):
+    rate, requests = live.error_rate(now)
+    if requests >= ERROR_RATE_MIN_REQUESTS and rate >= ERROR_RATE_THRESHOLD:
+        return f"최근 {LIVE_WINDOW_SECONDS // 60}분 5xx 비율 {rate:.1%} (요청 {requests}건)"
+    return None
+
+
+def zero_traffic_condition(now):
+    if not ZERO_TRAFFIC_MINUTES:
+        return None
+    quiet_seconds = now - (live.last_request_at or live_started_at)
+    if quiet_seconds >= ZERO_TRAFFIC_MINUTES * 60:
+        return f"{quiet_seconds / 60:.0f}분 동안 요청이 없습니다"
+    return None
+
+
+live_rules = [
+    AlertRule('5xx 비율 급증', error_rate_condition),
+    AlertRule('트래픽 없음', zero_traffic_condition),
+]
+
+
+def check_live_rules():
+    for rule in live_rules:
+        change = rule.evaluate()
+        if change is None:
+            continue
+        firing, detail = change
+        if firing:
+            message = f"🚨ALERT {rule.name} - {ENVIRONMENT.upper()} SERVER🚨\n{detail}"
+        else:
+            message = f"✅ 해소: {rule.name} - {ENVIRONMENT.upper()} SERVER"
+        print(message)
+        send_slack_log_notification(message)
+
+EVENT_COALESCE_SECONDS = float(os.getenv('EVENT_COALESCE_SECONDS', str(COALESCE_SECONDS)))
+LOG_POLL_INTERVAL_SECONDS = float(os.getenv('LOG_POLL_INTERVAL_SECONDS', str(POLL_INTERVAL_SECONDS)))
+# 주기적으로 다시 확인하는 건 이 시간 안에 수정된 파일뿐이다. 지난 날짜의 로그는 수정 이벤트가 올 때만 읽는다
+LOG_POLL_RECENT_SECONDS = float(os.getenv('LOG_POLL_RECENT_SECONDS', '86400'))
+# 이 시간 동안 수정되지 않고 끝까지 읽은 파일은 tailer 를 닫는다. 다시 바뀌면 체크포인트에서 이어서 연다
+TAILER_IDLE_SECONDS = float(os.getenv('TAILER_IDLE_SECONDS', '3600'))
+
+
+def get_tailer(file_path):
+    tailer = tailers.get(file_path)
+    if tailer is not None:
+        return tailer
+
+    checkpoint = checkpoints.get(file_path)
+    if checkpoint is not None:
+        tailer = LogTailer(file_path, checkpoint['offset'], checkpoint['inode'])
+    elif os.path.exists(file_path) and os.path.getmtime(file_path) > checkpoints.since:
+        # 마지막 체크포인트 이후에 생긴 파일은 처음부터 읽는다
+        tailer = LogTailer(file_path, 0)
+    else:
+        tailer = LogTailer(file_path)
+    tailers[file_path] = tailer
+    return tailer
 
 
-last_checked_line = dict()
+def check(file_path):
+    file_path = os.path.abspath(file_path)
+    tailer = get_tailer(file_path)
 
+    last_line = None
+    lines = 0
+    for line in tailer.read_lines():
+        last_line = line
+        lines += 1
+        live.feed(line)
+        dispatch(line)
+    # 줄마다 세지 않고 한 번 읽을 때마다 더해서 처리 경로의 비용을 늘리지 않는다
+    metrics.inc(LINES_READ_METRIC, lines)
+    last_read_at[file_path] = time.time()
+
+    if tailer.offset is not None:
+        timestamp = last_line[:23] if last_line is not None else None
+        stage_checkpoint(file_path, tailer.inode, tailer.offset, timestamp)
 
-def check(file_path):
-    global last_checked_line
 
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        if file_path not in last_checked_line:
-            last_checked_line[file_path] = len(lines)
-        lines = lines[last_checked_line.get(file_path):]
+def stage_checkpoint(file_path, inode, offset, timestamp=None):
+    pending_checkpoints.append((sink.mark(), file_path, inode, offset, timestamp))
 
-    for line in lines:
-        for prefix, handler_func in handler.items():
+
+def release_checkpoints():
+    # 알림이 아직 큐나 재시도 대기에 있는 줄은 저장하지 않는다. 그 사이에 죽으면 다시 읽어서 보낸다
+    while pending_checkpoints and sink.done(pending_checkpoints[0][0]):
+        mark, file_path, inode, offset, timestamp = pending_checkpoints.popleft()
+        checkpoints.update(file_path, inode, offset, timestamp)
+    checkpoints.flush()
+
+
+def dispatch(line):
+    match = dispatcher.match(line)
+    if match is None:
+        for prefix, live_event in LIVE_PREFIXES.items():
             if prefix in line:
-                try:
-                    handler_func(line)
-                except Exception:
-                    message = f"🚨ALERT ERROR - {ENVIRONMENT.upper()} SERVER🚨\nlogging: {line}"
-                    print(message)
-                    send_slack_log_notification(message)
-                break
+                live.count(live_event, line)
+        return
+    handler_func, event = match
+    if event is not None and deduper.seen(event):
+        metrics.inc(DUPLICATES_METRIC, handler=handler_func.__name__)
+        return
+    metrics.inc(EVENTS_METRIC, handler=handler_func.__name__)
+    live_event = LIVE_EVENTS.get(handler_func)
+    if live_event is not None:
+        live.count(live_event, line)
+    try:
+        if handler_func(line) is False:
+            return
+    except Exception:
+        metrics.inc(HANDLER_ERRORS_METRIC, handler=handler_func.__name__)
+        message = f"🚨ALERT ERROR - {ENVIRONMENT.upper()} SERVER🚨\nlogging: {line}"
+        print(message)
+        send_slack_log_notification(message)
+    # 처리한 줄은 보낸 것으로 남겨, 같은 구간을 재처리해도 다시 보내지 않는다
+    ledger.add(line)
+
+
+def check_compressed(file_path):
+    # 회전되며 압축된 파일은 원본에서 아직 처리하지 못한 꼬리만 알림을 보낸다
+    file_path = os.path.abspath(file_path)
+    original_path = uncompressed_path(file_path)
+    if os.path.exists(original_path) or not os.path.exists(file_path):
+        return  # 아직 압축하는 중
+
+    inode = os.stat(file_path).st_ino
+    checkpoint = checkpoints.get(file_path)
+    if checkpoint is not None and checkpoint['inode'] == inode:
+        return
+    original = checkpoints.get(original_path)
+    if original is not None:
+        offset = original['offset']
+    elif os.path.getmtime(file_path) > checkpoints.since:
+        offset = 0
+    else:
+        # 감시를 시작하기 전에 이미 압축된 파일은 지난 기록이라 알림 없이 넘어간다
+        stage_checkpoint(file_path, inode, 0)
+        return
 
-    last_checked_line[file_path] += len(lines)
+    end, last_line, lines = offset, None, 0
+    try:
+        for end, line in iter_lines_after(file_path, offset):
+            last_line = line
+            lines += 1
+            live.feed(line)
+            dispatch(line)
+    except Exception as e:
+        print(f"압축 로그 읽기 실패: {file_path}, 에러: {e}")
+        return
+    finally:
+        metrics.inc(LINES_READ_METRIC, lines)
+    tailer = tailers.pop(original_path, None)
+    if tailer is not None:
+        tailer.close()
+    timestamp = last_line[:23] if last_line is not None else None
+    stage_checkpoint(file_path, inode, end, timestamp)
+
+
+def check_any(file_path):
+    if is_compressed(file_path):
+        check_compressed(file_path)
+    else:
+        check(file_path)
+
+
+def list_log_files(path) -> list:
+    file_paths = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted_log_files(files):
+            file_paths.append(os.path.abspath(os.path.join(root, filename)))
+    return file_paths
+
+
+def list_recent_log_files(path) -> list:
+    # 스케줄러 스레드에서 불리므로 tailer 정리도 여기서 해서 읽는 중인 tailer 를 닫지 않는다
+    now = time.time()
+    evict_idle_tailers(now)
+    recent = []
+    for file_path in list_log_files(path):
+        try:
+            if now - os.path.getmtime(file_path) <= LOG_POLL_RECENT_SECONDS:
+                recent.append(file_path)
+        except OSError:
+            continue
+    return recent
+
+
+def evict_idle_tailers(now):
+    staged = {entry[1] for entry in list(pending_checkpoints)}
+    for file_path, tailer in list(tailers.items()):
+        if file_path in staged:
+            continue  # 아직 저장하지 않은 체크포인트가 있으면 다시 열 때 같은 줄을 또 읽는다
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stat = None
+        if stat is not None and (now - stat.st_mtime < TAILER_IDLE_SECONDS or tailer.offset != stat.st_size):
+            continue
+        tailer.close()
+        tailers.pop(file_path, None)
+        last_read_at.pop(file_path, None)
+
+
+def catch_up(path):
+    # 재시작하는 동안 쌓인 로그를 실시간 감시 전에 한 번에 처리
+    for file_path in list_log_files(path):
+        check_any(file_path)
+    release_checkpoints()
+
+
+def collect_slack_metrics():
+    yield 'observer_slack_sent_total', COUNTER, {}, slack.sent
+    yield 'observer_slack_failed_total', COUNTER, {}, slack.failed
+    yield 'observer_slack_dropped_total', COUNTER, {}, slack.dropped
+    yield 'observer_slack_queue_depth', GAUGE, {}, slack.pending()
+    yield 'observer_slack_send_latency_ms', SUMMARY, {}, slack.latency
+
+
+def collect_tail_lag():
+    # 아직 읽지 않은 바이트와, 밀려 있다면 마지막으로 끝까지 읽은 뒤 지난 시간
+    now = time.time()
+    for file_path, tailer in list(tailers.items()):
+        if tailer.offset is None:
+            continue
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            continue
+        behind = max(size - tailer.offset, 0)
+        seconds = now - last_read_at.get(file_path, now) if behind else 0
+        yield 'observer_tail_lag_bytes', GAUGE, {'file': file_path}, behind
+        yield 'observer_tail_lag_seconds', GAUGE, {'file': file_path}, round(seconds, 3)
+
+
+def collect_error_metrics():
+    yield 'observer_error_alerts_suppressed_total', COUNTER, {}, error_guard.suppressed
+
+
+def collect_live_metrics():
+    snapshot = live.snapshot()
+    yield 'observer_live_requests_per_minute', GAUGE, {}, round(snapshot['requests_per_minute'], 3)
+    yield 'observer_live_visitors', GAUGE, {}, snapshot['visitors']
+    yield 'observer_live_error_rate', GAUGE, {}, round(snapshot['error_rate'], 4)
+    for event, value in snapshot['events'].items():
+        yield 'observer_live_events', GAUGE, {'event': event}, value
+
+
+metrics.register(collect_slack_metrics)
+metrics.register(collect_error_metrics)
+metrics.register(collect_tail_lag)
+metrics.register(collect_live_metrics)
+
+
+def create_metrics_summary_message(started_at) -> str:
+    counters = dict(metrics.counters)
+    events = [f"{dict(labels)['handler']} {value}" for (name, labels), value in sorted(counters.items())
+              if name == EVENTS_METRIC]
+    errors = sum(value for (name, labels), value in counters.items() if name == HANDLER_ERRORS_METRIC)
+    send_p99 = slack.latency.quantile(0.99)
+    snapshot = live.snapshot()
+    live_events = ', '.join(f"{event} {value}" for event, value in sorted(snapshot['events'].items()))
+    lag_bytes = max((value for name, kind, labels, value in collect_tail_lag() if name == 'observer_tail_lag_bytes'),
+                    default=0)
+    return f"""📊 *Observer 상태 - {ENVIRONMENT.upper()} SERVER*
+    - ⏱️ 가동 시간: {(time.time() - started_at) / 3600:.1f}시간
+    - 📄 읽은 줄: {counters.get((LINES_READ_METRIC, ()), 0)}
+    - 🔔 이벤트: {', '.join(events) or '없음'}
+    - 🚨 핸들러 오류: {errors}
+    - 📈 최근 {LIVE_WINDOW_SECONDS // 60}분: 분당 요청 {snapshot['requests_per_minute']:.1f}, 방문자 {snapshot['visitors']}, 5xx {snapshot['error_rate']:.1%}, 이벤트 {live_events or '없음'}
+    - 💬 Slack 전송 {slack.sent} / 실패 {slack.failed} / 버림 {slack.dropped} / 대기 {slack.pending()} (p99 {'-' if send_p99 is None else send_p99}ms)
+    - 🐢 가장 밀린 파일: {lag_bytes} bytes
+    """
 
 
 class LogHandler(FileSystemEventHandler):
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
     def on_modified(self, event):
         if event.is_directory:
             return
 
-        if event.src_path.endswith('.log'):  # 로그 파일만 감지
-            check(event.src_path)
+        if event.src_path.endswith(LOG_FILE_SUFFIXES):  # 로그 파일만 감지
+            self.scheduler.notify(os.path.abspath(event.src_path))
+
+    def on_deleted(self, event):
+        # 압축이 끝나면 원본이 지워지므로 그때 압축본에 남은 꼬리를 처리한다
+        if event.is_directory or not event.src_path.endswith('.log'):
+            return
+        for suffix in COMPRESSED_SUFFIXES:
+            self.scheduler.notify(os.path.abspath(event.src_path + suffix))
 
 
 if __name__ == "__main__":
     path = "logs/"
-    event_handler = LogHandler()
+    ledger = SentLedger(SENT_LEDGER_PATH)
+    slack.start()
+    file_writers.start()
+    catch_up(path)
+    scheduler = EventScheduler(check_any, EVENT_COALESCE_SECONDS, lambda: list_recent_log_files(path),
+                               LOG_POLL_INTERVAL_SECONDS)
+    scheduler.start()
+    metrics.register(lambda: [('observer_file_events_total', COUNTER, {}, scheduler.events),
+                              ('observer_event_latency_ms', SUMMARY, {}, scheduler.latency)])
+    if METRICS_PORT:
+        start_metrics_server(metrics, METRICS_PORT)
+    event_handler = LogHandler(scheduler)
     observer = Observer()
     observer.schedule(event_handler, path, recursive=True)
     observer.start()
     message = f"Observer started: {datetime.now()}"
     print(message)
     send_slack_log_notification(message)
+    started_at = time.time()
+    next_summary = time.monotonic() + METRICS_SUMMARY_SECONDS
+    # 배포 스크립트는 SIGTERM 으로 멈춘다. Ctrl+C 와 같은 순서로 파일 기록을 비우고 남은 알림을 보낸 뒤 체크포인트를 저장한다
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
     try:
-        while True:
-            time.sleep(1)
+        while not stopping.wait(1):
+            release_checkpoints()
+            send_error_summaries()
+            check_live_rules()
+            if METRICS_SUMMARY_SECONDS > 0 and time.monotonic() >= next_summary:
+                next_summary += METRICS_SUMMARY_SECONDS
+                send_slack_log_notification(create_metrics_summary_message(started_at))
     except KeyboardInterrupt:
-        observer.stop()
+        pass
+    observer.stop()
     observer.join()
+    scheduler.stop()
+    print(f"로그 이벤트 처리 통계: {scheduler.stats()}")
+    # 종료 전에 묶어 둔 오류 건수를 놓치지 않는다
+    error_guard.summary_interval = 0
+    send_error_summaries()
+    sink.close()
+    slack.stop(timeout=SHUTDOWN_DRAIN_SECONDS)
+    release_checkpoints()
+    ledger.close()
+    if pending_checkpoints:
+        print(f"보내지 못한 알림이 있어 체크포인트 {len(pending_checkpoints)}건을 남겨 두고 종료합니다")
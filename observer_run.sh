@@ -1,3 +1,23 @@
 cd /home/ubuntu/signal-api
-sudo ps -ef | grep '[p]ython.*observer\.py' | awk '{print $2}' | xargs sudo kill -9
-nohup python3 observer.py > observer.out > /dev/null 2>&1 &
\ No newline at end of file
+pids=$(sudo ps -ef | grep '[p]ython.*observer\.py' | awk '{print $2}')
+if [ -n "$pids" ]; then
+    # SIGTERM 을 받으면 큐에 남은 알림을 보내고 체크포인트를 저장한 뒤 끝난다
+    echo $pids | xargs sudo kill -TERM
+    for i in $(seq 1 60); do
+        if ! pgrep -f "python.*observer\.py" > /dev/null; then
+            break
+        fi
+        sleep 1
+    done
+    # 두 개가 함께 돌면 알림이 두 번 가고 체크포인트를 서로 덮어쓰므로, 끝나지 않은 observer 는 강제로 끝낸다
+    if pgrep -f "python.*observer\.py" > /dev/null; then
+        echo "observer 가 60초 안에 끝나지 않아 강제 종료합니다: $pids"
+        echo $pids | xargs sudo kill -KILL
+        sleep 1
+    fi
+    if pgrep -f "python.*observer\.py" > /dev/null; then
+        echo "observer 가 아직 떠 있어 새로 시작하지 않습니다"
+        exit 1
+    fi
+fi
+nohup python3 observer.py > observer.out > /dev/null 2>&1 &
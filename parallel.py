@@ -0,0 +1,126 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from dedupe import WINDOW_MINUTES
+from logreader import LOG_ROOT, is_compressed, iter_compressed_lines, iter_log_files, open_log, start_offset
+from timeindex import INDEX_TOLERANCE
+from timestamps import TimeWindow, has_timestamp, parse_timestamp
+
+CHUNK_BYTES = 32 * 1024 * 1024
+# 작업자마다 자기 구간 앞을 이만큼 더 읽어 중복 제거기를 채운다
+PRIME_HORIZON = timedelta(minutes=WINDOW_MINUTES)
+
+
+def split_ranges(filepath, start=0, chunk_bytes=CHUNK_BYTES) -> list:
+    if is_compressed(filepath):
+        # 압축 파일은 중간부터 풀 수 없으니 한 작업자가 통째로 읽는다
+        return [(filepath, 0, None)]
+    # 줄 중간에서 자르지 않도록 각 경계를 다음 줄의 시작으로 옮긴다
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, 'rb') as file:
+        while start < size:
+            end = start + chunk_bytes
+            if end < size:
+                file.seek(end - 1)
+                file.readline()
+                end = file.tell()
+            end = min(end, size)
+            ranges.append((filepath, start, end))
+            start = end
+    return ranges
+
+
+def iter_range_lines(filepath, start, end, window):
+    if end is None:
+        for line in iter_compressed_lines(filepath, window):
+            yield line.strip()
+        return
+    with open(filepath, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            raw = file.readline()
+            if not raw:
+                break
+            position += len(raw)
+            line = raw.decode('utf-8', errors='replace')
+            if window.contains(line):
+                yield line.strip()
+
+
+def scan_range(filepath, start, end, start_datetime, end_datetime, create_aggregators, prime=()) -> dict:
+    window = TimeWindow(start_datetime, end_datetime)
+    aggregators = create_aggregators()
+    # 앞 구간의 끝부분은 세지 않고 중복 제거기만 채운다. 경계에 걸친 중복도 직렬로 읽을 때처럼 한 번만 센다
+    for prime_path, prime_start, prime_end in prime:
+        for line in iter_range_lines(prime_path, prime_start, prime_end, window):
+            for aggregator in aggregators.values():
+                aggregator.prime(line)
+    for line in iter_range_lines(filepath, start, end, window):
+        for aggregator in aggregators.values():
+            aggregator.feed(line)
+    return aggregators
+
+
+def first_timestamp(filepath, start=0):
+    # 구간 첫 줄의 기록 시각. 스택 트레이스처럼 시각이 없는 줄은 건너뛴다
+    with open_log(filepath) as file:
+        if start:
+            file.seek(start)
+        for raw in file:
+            line = raw.decode('utf-8', errors='replace')
+            if has_timestamp(line):
+                return parse_timestamp(line)
+    return None
+
+
+def prime_ranges(ranges, index, horizon=PRIME_HORIZON, use_index=True, tolerance=INDEX_TOLERANCE) -> list:
+    # ranges[index] 의 첫 줄보다 horizon 앞까지 거슬러 올라간 (파일, 시작, 끝) 목록, 읽는 순서대로
+    first = first_timestamp(*ranges[index][:2])
+    if first is None:
+        return []
+    since = first - horizon
+    spans = []
+    for filepath, start, end in reversed(ranges[:index]):
+        if end is None:
+            break  # 압축 파일은 중간부터 풀 수 없어 그 앞은 채우지 않는다
+        offset = max(start_offset(filepath, since, tolerance), start) if use_index else start
+        spans.append((filepath, offset, end))
+        if offset > start:
+            break
+        head = first_timestamp(filepath, start)
+        if head is not None and head < since:
+            break
+    spans.reverse()
+    return spans
+
+
+def merge_aggregators(results) -> dict:
+    merged = None
+    for aggregators in results:
+        if merged is None:
+            merged = aggregators
+            continue
+        for key, aggregator in aggregators.items():
+            merged[key].merge(aggregator)
+    return merged
+
+
+def scan_parallel(start_datetime: datetime, end_datetime: datetime, create_aggregators, workers=None,
+                  root=LOG_ROOT, use_index=True, tolerance=INDEX_TOLERANCE, chunk_bytes=CHUNK_BYTES) -> dict:
+    # 작업자는 원본 줄 대신 합칠 수 있는 부분 집계만 돌려준다
+    ranges = []
+    for filepath in iter_log_files(start_datetime, end_datetime or datetime.now(), root):
+        offset = start_offset(filepath, start_datetime, tolerance) if use_index else 0
+        ranges.extend(split_ranges(filepath, offset, chunk_bytes))
+    if not ranges:
+        return create_aggregators()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scan_range, filepath, start, end, start_datetime, end_datetime, create_aggregators,
+                                   prime_ranges(ranges, index, use_index=use_index, tolerance=tolerance))
+                   for index, (filepath, start, end) in enumerate(ranges)]
+        return merge_aggregators(future.result() for future in futures)
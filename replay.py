@@ -0,0 +1,93 @@
+import argparse
+import time
+
+from datetime import datetime
+
+import observer
+from logreader import LOG_ROOT, MMAP_ENGINE, iter_lines_between
+from sinks import DryRunSink, FileSink, SentLedger, SlackSink
+from timestamps import parse_timestamp
+
+DRY_RUN_SINK = 'dry-run'
+FILE_SINK = 'file'
+SLACK_SINK = 'slack'
+
+
+def create_sink(kind, output=None):
+    if kind == DRY_RUN_SINK:
+        return DryRunSink()
+    if kind == FILE_SINK:
+        return FileSink(output or 'replay_output.jsonl')
+    if kind == SLACK_SINK:
+        return SlackSink(observer.slack, block=True)
+    raise ValueError(f"지원하지 않는 출력 방식입니다: {kind}")
+
+
+def replay(start_datetime: datetime, end_datetime: datetime, sink, ledger, root=LOG_ROOT, engine=MMAP_ENGINE):
+    # 지난 로그를 실시간 감시와 같은 핸들러로 다시 흘려보낸다. 감시 대기나 전송 대기 없이 읽는 속도로 처리한다
+    observer.sink = sink
+    observer.ledger = ledger
+    # 오류 폭주 묶음과 요약 주기를 벽시계가 아니라 로그 시각으로 센다
+    observer.error_clock = log_time
+    lines = dispatched = skipped = 0
+    clock = None
+    markers = observer.dispatcher.markers()
+    for line in iter_lines_between(start_datetime, end_datetime, root, engine=engine, markers=markers):
+        lines += 1
+        if observer.dispatcher.match(line) is None:
+            continue
+        if line in ledger:
+            skipped += 1
+            continue
+        now = log_time(line)
+        if clock is None or int(now) != int(clock):
+            observer.send_error_summaries(now)
+        clock = now
+        # 보낸 줄은 dispatch 가 ledger 에 남긴다
+        observer.dispatch(line)
+        dispatched += 1
+    if clock is not None:
+        # 구간이 끝나면 주기와 상관없이 남은 요약을 모두 보낸다
+        observer.error_guard.summary_interval = 0
+        observer.send_error_summaries(clock)
+    return lines, dispatched, skipped
+
+
+def log_time(line) -> float:
+    return parse_timestamp(line).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='지난 로그를 알림 핸들러로 다시 처리합니다')
+    parser.add_argument('start', help="시작 시각 (예: '2025-05-18 00:00')")
+    parser.add_argument('end', nargs='?', help='끝 시각, 없으면 지금까지')
+    parser.add_argument('--sink', choices=(DRY_RUN_SINK, FILE_SINK, SLACK_SINK), default=DRY_RUN_SINK)
+    parser.add_argument('--output', help='file 출력 경로')
+    parser.add_argument('--ledger', default=observer.SENT_LEDGER_PATH, help='실시간 감시와 함께 쓰는 전송 기록 파일')
+    parser.add_argument('--root', default=LOG_ROOT)
+    args = parser.parse_args()
+
+    start_datetime = datetime.strptime(args.start, '%Y-%m-%d %H:%M')
+    end_datetime = datetime.strptime(args.end, '%Y-%m-%d %H:%M') if args.end else None
+    sink = create_sink(args.sink, args.output)
+    # 미리 보기는 기록을 읽기만 해야 나중에 실제로 보낼 수 있다
+    ledger = SentLedger(args.ledger, read_only=args.sink == DRY_RUN_SINK)
+    if start_datetime < datetime.now() - ledger.retention:
+        print(f"시작 시각이 전송 기록 보존 기간({ledger.retention.days}일)보다 오래되어 이미 보낸 알림을 다시 보낼 수 있습니다")
+    if args.sink == SLACK_SINK:
+        observer.slack.start()
+
+    began = time.perf_counter()
+    try:
+        lines, dispatched, skipped = replay(start_datetime, end_datetime, sink, ledger, args.root)
+    finally:
+        if args.sink == SLACK_SINK:
+            observer.slack.stop(timeout=None)
+        sink.close()
+        ledger.close()
+    elapsed = time.perf_counter() - began
+    print(f"후보 줄 {lines}개 중 {dispatched}건 처리, 이미 보낸 {skipped}건 건너뜀 ({elapsed:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import math
+import os
+import re
+import time
+
+import requests
+
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from functools import partial
+
+from aggregators import EndpointStats, HandlerCounter, VisitorCounter, WindowedAggregators, feed_all
+from dispatcher import Dispatcher
+from latency import endpoint_report_lines
+from logreader import LOG_ROOT, iter_lines_between
+from parallel import scan_parallel
+from rollup import ROLLUP_PATH, RollupStore
+from sinks import FSYNC_CLOSE, FileWriterPool
+
+load_dotenv()
+SLACK_TOKEN = os.getenv('SLACK_TOKEN')
+SLACK_CHANNEL = os.getenv('SLACK_CHANNEL')
+
+SLACK_WEBHOOK_URL = 'https://slack.com/api/chat.postMessage'
+ARCHIVE_MAX_BYTES = int(os.getenv('ARCHIVE_MAX_BYTES', '0')) or None
+ARCHIVE_JSONL_PATH = os.getenv('ARCHIVE_JSONL_PATH')
+RECENT_ARCHIVE_PATH = '/home/ubuntu/signal-api/analysis.txt'
+SINCE_ARCHIVE_PATH = '/home/ubuntu/signal-api/analysis_date.txt'
+
+CREATED_FIXTURE = "\"Status\":201"
+CREATE_PROFILE_PREFIX = 'INFO com.yourssu.signal.config.filter.LoggingFilter - {"Reply":{"Method":"POST /api/profiles - '
+ISSUE_TICKET_PREFIX = 'INFO com.yourssu.signal.infrastructure.Notification - Issued ticket'
+RETRY_ISSUE_TICKET_PREFIX = 'INFO com.yourssu.signal.infrastructure.Notification - RetryIssuedTicket'
+CONSUME_TICKET_PREFIX = 'INFO com.yourssu.signal.infrastructure.Notification - Consumed ticket'
+
+CREATE_PROFILE_KEY = "createProfile"
+CONSUMED_TICKET_KEY = "consumedTicket"
+ISSUED_TICKET_KEY = "issuedTicket"
+VISITOR_COUNT_KEY = "visitorCount"
+HANDLER_COUNT_KEY = "handlerCount"
+ENDPOINT_STATS_KEY = "endpointStats"
+
+DURATION_PATTERN = re.compile(r'(\d+)([hd])')
+HOURS_PER_UNIT = {'h': 1, 'd': 24}
+WINDOWS_KEY = 'windows'
+
+
+def create_analysis_message(start_time, visitor_count, profile_count, issued_ticket_count, consume_ticket_count,
+                            endpoint_stats=None, minutes=0, hours=None) -> str:
+    # 제목의 시간은 넘겨받지 않으면 시작 시각부터 지금까지로 계산한다
+    hours = hours or get_total_hours(start_time)
+    return f""" *💌 시그널 최근 {hours} 시간 분석 보고서 💌*
+    - *📅  분석 기간* : {start_time.strftime('%Y년 %m월 %d일 %H시 %M분')} ~ {datetime.now().strftime('%Y년 %m월 %d일 %H시 %M분')}
+    - *👥  방문자 수* : {visitor_count} 명
+    - *👤 등록한 프로필* : {profile_count} 개
+    - *🎁  발급한 이용권* : {issued_ticket_count} 개
+    - *💌  사용한 이용권* : {consume_ticket_count} 개
+{create_endpoint_message(endpoint_stats, minutes)}"""
+
+
+def create_endpoint_message(endpoint_stats, minutes) -> str:
+    if not endpoint_stats:
+        return ''
+    lines = '\n'.join(f"        - {line}" for line in endpoint_report_lines(endpoint_stats, minutes))
+    return f"""    - *⏱️  API 응답 시간* :
+{lines}
+"""
+
+
+def get_created_profile(line, dic):
+    if CREATED_FIXTURE in line:
+        dic[CREATE_PROFILE_KEY] += 1
+
+
+def get_issued_ticket(line, dic):
+    verification, uuid, ticket, available_ticket = line[line.find('&') + 1:].split(' ')
+    dic[ISSUED_TICKET_KEY] += int(ticket)
+
+
+def get_ticket_by_bank_deposit(line, dic):
+    verification, uuid, ticket, available_ticket, name = line[line.find('&') + 1:].split(' ')
+    dic[ISSUED_TICKET_KEY] += int(ticket)
+
+
+def get_consumed_ticket_message(line, dic):
+    dic[CONSUMED_TICKET_KEY] += 1
+
+
+handler = {
+    CREATE_PROFILE_PREFIX: get_created_profile,
+    ISSUE_TICKET_PREFIX: get_issued_ticket,
+    RETRY_ISSUE_TICKET_PREFIX: get_ticket_by_bank_deposit,
+    CONSUME_TICKET_PREFIX: get_consumed_ticket_message,
+}
+dispatcher = Dispatcher(handler)
+
+
+def create_aggregators(deduper=None) -> dict:
+    # 새 지표는 집계기를 여기에 추가하면 같은 한 번의 스캔에서 함께 계산된다
+    return {
+        VISITOR_COUNT_KEY: VisitorCounter(),
+        HANDLER_COUNT_KEY: HandlerCounter(dispatcher, deduper),
+        ENDPOINT_STATS_KEY: EndpointStats(),
+    }
+
+
+def send_slack_notification(message):
+    payload = {
+        'channel': SLACK_CHANNEL,
+        'text': message
+    }
+    headers = {
+        'Authorization': f'Bearer {SLACK_TOKEN}',
+        'Content-Type': 'application/json'
+    }
+    log = requests.post(SLACK_WEBHOOK_URL, json=payload, headers=headers)
+    print(log.text)
+
+
+def append_or_create_file(filename, content):
+    # 보고서 기록은 ARCHIVE_MAX_BYTES 를 주면 그 크기에서 돌려 쓰고, 원하면 JSONL 로도 남긴다
+    with FileWriterPool(ARCHIVE_JSONL_PATH, fsync=FSYNC_CLOSE, max_bytes=ARCHIVE_MAX_BYTES) as archive:
+        archive.write(filename, content)
+
+
+def to_datetime(date_str, date_format="%Y-%m-%d %H:%M") -> datetime:
+    try:
+        return datetime.strptime(date_str, date_format)
+    except ValueError:
+        raise ValueError(f"Invalid date format: {date_str}. Expected format: {date_format}")
+
+
+def get_total_hours(start_time: datetime) -> int:
+    diff = datetime.now() - start_time
+    total_hours = diff.total_seconds() / 3600
+    return math.ceil(total_hours)
+
+
+def parse_window(text, now: datetime) -> tuple:
+    # '2h', '1d' 는 지금부터 거슬러 올라간 창, '2025-05-19 18:00' 은 그 시각부터 지금까지의 창
+    # argparse 의 type 으로 쓰여서 잘못된 값은 사용법과 함께 알린다
+    match = DURATION_PATTERN.fullmatch(text)
+    if match:
+        hours = int(match.group(1)) * HOURS_PER_UNIT[match.group(2)]
+        return now - timedelta(hours=hours), hours, RECENT_ARCHIVE_PATH
+    try:
+        start_time = to_datetime(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'2h', '7d' 같은 기간이나 'YYYY-MM-DD HH:MM' 형식의 시작 시각이어야 합니다: {text}")
+    if start_time >= now:
+        raise argparse.ArgumentTypeError(f"시작 시각이 지금보다 늦습니다: {text}")
+    return start_time, None, SINCE_ARCHIVE_PATH
+
+
+def report_args(window, use_rollup=True, workers=1) -> list:
+    # analysis.py, analysis_date.py 의 run() 인자를 report.main 인자로 바꿀 때 쓴다
+    args = [window, '--workers', str(workers)]
+    if not use_rollup:
+        args.append('--no-rollup')
+    return args
+
+
+def create_windowed_aggregators(starts) -> dict:
+    return {WINDOWS_KEY: WindowedAggregators(starts, create_aggregators)}
+
+
+def collect_from_scan(start_times, end_time, root=LOG_ROOT, workers=1):
+    # 가장 이른 시작부터 한 번만 읽고, 줄마다 속한 구간 하나에만 넘긴다
+    create = partial(create_windowed_aggregators, start_times)
+    if workers > 1:
+        windows = scan_parallel(min(start_times), end_time, create, workers, root)[WINDOWS_KEY]
+    else:
+        windows = create()[WINDOWS_KEY]
+        feed_all(iter_lines_between(min(start_times), end_time, root), [windows])
+    for start, aggregators in windows.result():
+        yield (aggregators[VISITOR_COUNT_KEY].result(), aggregators[HANDLER_COUNT_KEY].result(),
+               aggregators[ENDPOINT_STATS_KEY].result())
+
+
+def collect_from_rollup(start_times, end_time, root=LOG_ROOT, rollup_path=ROLLUP_PATH):
+    # 이미 닫힌 분 단위 집계는 저장소에 남아 있어서, 주기적으로 돌려도 지난 실행 뒤에 쌓인 로그만 읽는다
+    rollups = RollupStore(dispatcher, rollup_path)
+    try:
+        rollups.update(root)
+        for start_time in sorted(start_times, reverse=True):
+            yield (rollups.visitor_count(start_time, end_time), rollups.counts(start_time, end_time),
+                   rollups.endpoint_stats(start_time, end_time).result())
+    finally:
+        rollups.close()
+
+
+def create_reports(windows, end_time, results) -> list:
+    # 창과 결과는 모두 짧은 창부터 나온다
+    reports = []
+    for (start_time, hours, archive_path), (visitor_count, dic, endpoint_stats) in zip(windows, results):
+        message = create_analysis_message(start_time=start_time,
+                                          visitor_count=visitor_count,
+                                          profile_count=dic[CREATE_PROFILE_KEY],
+                                          issued_ticket_count=dic[ISSUED_TICKET_KEY],
+                                          consume_ticket_count=dic[CONSUMED_TICKET_KEY],
+                                          endpoint_stats=endpoint_stats,
+                                          minutes=(end_time - start_time).total_seconds() / 60,
+                                          hours=hours)
+        reports.append((archive_path, message))
+    return reports
+
+
+def main(argv=None):
+    end_time = datetime.now()
+    parser = argparse.ArgumentParser(description='여러 기간의 분석 보고서를 한 번의 로그 읽기로 만듭니다')
+    parser.add_argument('windows', nargs='+', type=partial(parse_window, now=end_time),
+                        help="'1h', '24h', '7d' 같은 최근 기간이나 시작 시각 (예: '2025-05-19 18:00')")
+    parser.add_argument('--no-rollup', action='store_true', help='롤업 저장소 없이 로그를 처음부터 읽는다')
+    parser.add_argument('--rollup', default=ROLLUP_PATH, help='분 단위 집계 저장소 경로')
+    parser.add_argument('--workers', type=int, default=1, help='--no-rollup 일 때 나눠 읽을 프로세스 수')
+    parser.add_argument('--root', default=LOG_ROOT)
+    parser.add_argument('--dry-run', action='store_true', help='보내거나 기록하지 않고 출력만 한다')
+    args = parser.parse_args(argv)
+    if args.workers > 1 and not args.no_rollup:
+        parser.error('--workers 는 로그를 직접 읽는 --no-rollup 과 함께 써야 합니다')
+
+    windows = sorted(args.windows, key=lambda window: window[0], reverse=True)
+    start_times = [start_time for start_time, hours, archive_path in windows]
+
+    began = time.perf_counter()
+    if args.no_rollup:
+        results = collect_from_scan(start_times, end_time, args.root, args.workers)
+    else:
+        results = collect_from_rollup(start_times, end_time, args.root, args.rollup)
+    reports = create_reports(windows, end_time, results)
+    elapsed = time.perf_counter() - began
+
+    for archive_path, message in reports:
+        if args.dry_run:
+            print(message)
+            continue
+        send_slack_notification(message)
+        append_or_create_file(archive_path, f"\n{message}\n")
+    print(f"보고서 {len(reports)}개 ({elapsed:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from collections import defaultdict
+from datetime import datetime
+
+from aggregators import EndpointStats, HandlerCounter
+from cardinality import DEFAULT_ERROR, EXACT_MODE, create_cardinality_counter, load_cardinality_counter
+from dedupe import EventDeduper
+from extract import extract_real_ip
+from latency import EndpointStat
+from logreader import LOG_ROOT, is_compressed, iter_lines_after, sorted_log_files, uncompressed_path
+from tailer import LogTailer
+from timestamps import has_timestamp
+
+ROLLUP_PATH = '/home/ubuntu/signal-api/analysis_rollup.db'
+MINUTE_LENGTH = len('2025-05-18 01:36')
+BATCH_LINES = 50000
+# 이 시간 동안 수정되지 않은 파일의 개행 없는 마지막 줄은 완성된 것으로 본다
+IDLE_SECONDS = 60
+VISITOR_MODE = os.getenv('VISITOR_COUNT_MODE', EXACT_MODE)
+VISITOR_ERROR = float(os.getenv('VISITOR_COUNT_ERROR', str(DEFAULT_ERROR)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offsets (path TEXT PRIMARY KEY, inode INTEGER, offset INTEGER);
+CREATE TABLE IF NOT EXISTS minute_counts (minute TEXT, key TEXT, value INTEGER, PRIMARY KEY (minute, key));
+CREATE TABLE IF NOT EXISTS minute_visitors (minute TEXT, ip TEXT, PRIMARY KEY (minute, ip));
+CREATE TABLE IF NOT EXISTS minute_sketches (minute TEXT PRIMARY KEY, sketch BLOB);
+CREATE TABLE IF NOT EXISTS minute_endpoints (minute TEXT, endpoint TEXT, stat TEXT, PRIMARY KEY (minute, endpoint));
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def to_minute(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M')
+
+
+class RollupStore:
+    def __init__(self, dispatcher, path=ROLLUP_PATH, mode=VISITOR_MODE, error=VISITOR_ERROR):
+        self.dispatcher = dispatcher
+        self.path = path
+        self.mode = mode
+        self.error = error
+        # 분 단위 버킷마다 따로 세더라도 중복 판단은 파일 전체에서 같이 한다
+        self.deduper = EventDeduper()
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._check_mode()
+
+    def _check_mode(self):
+        # 방문자 집계 방식이 바뀌면 이전 분 단위 데이터와 섞을 수 없다
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO meta VALUES (?, ?)', ('visitor_mode', self.mode))
+        stored_mode = self.connection.execute("SELECT value FROM meta WHERE key = 'visitor_mode'").fetchone()[0]
+        if stored_mode != self.mode:
+            self.connection.close()
+            raise ValueError(f"롤업 저장소의 방문자 집계 방식({stored_mode})과 요청한 방식({self.mode})이 다릅니다: {self.path}")
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, root=LOG_ROOT):
+        for directory, dirs, files in os.walk(root):
+            dirs.sort()
+            for filename in sorted_log_files(files):
+                self.update_file(os.path.join(directory, filename))
+
+    def update_file(self, filepath):
+        if is_compressed(filepath):
+            self._update_compressed(filepath)
+            return
+        row = self.connection.execute('SELECT inode, offset FROM offsets WHERE path = ?', (filepath,)).fetchone()
+        inode, offset = row if row else (None, 0)
+        tailer = LogTailer(filepath, offset, inode)
+
+        buckets = self._create_buckets()
+        lines = 0
+        for line in tailer.read_lines():
+            self._feed(buckets, line)
+            lines += 1
+            if lines % BATCH_LINES == 0:
+                self._commit(filepath, tailer.inode, tailer.offset, buckets)
+                buckets.clear()
+        if time.time() - os.path.getmtime(filepath) > IDLE_SECONDS:
+            line = tailer.flush_partial()
+            if line is not None:
+                self._feed(buckets, line)
+        self._commit(filepath, tailer.inode, tailer.offset, buckets)
+        tailer.close()
+
+    def _update_compressed(self, filepath):
+        # 회전되며 압축된 파일은 더 바뀌지 않으니 한 번만 풀고, 원본에서 이미 센 앞부분은 건너뛴다
+        inode = os.stat(filepath).st_ino
+        row = self.connection.execute('SELECT inode FROM offsets WHERE path = ?', (filepath,)).fetchone()
+        if row and row[0] == inode:
+            return
+        original = self.connection.execute('SELECT offset FROM offsets WHERE path = ?',
+                                           (uncompressed_path(filepath),)).fetchone()
+        buckets = self._create_buckets()
+        end = original[0] if original else 0
+        try:
+            for end, line in iter_lines_after(filepath, end):
+                self._feed(buckets, line)
+        except Exception as e:
+            print(f"압축 로그 읽기 실패: {filepath}, 에러: {e}")
+            return
+        self._commit(filepath, inode, end, buckets)
+
+    def _create_buckets(self):
+        return defaultdict(lambda: [HandlerCounter(self.dispatcher, self.deduper), create_cardinality_counter(self.mode, self.error),
+                                    EndpointStats()])
+
+    def _feed(self, buckets, line):
+        line = line.strip()
+        if not has_timestamp(line):
+            return
+        bucket = buckets[line[:MINUTE_LENGTH]]
+        bucket[0].feed(line)
+        bucket[2].feed(line)
+        x_real_ip = extract_real_ip(line)
+        if x_real_ip:
+            bucket[1].add(x_real_ip)
+
+    def _commit(self, filepath, inode, offset, buckets):
+        # 집계와 읽은 위치를 한 트랜잭션으로 저장해서 같은 줄을 두 번 세지 않는다
+        with self.connection:
+            for minute, (counter, visitors, endpoint_stats) in buckets.items():
+                self.connection.executemany(
+                    'INSERT INTO minute_counts VALUES (?, ?, ?) '
+                    'ON CONFLICT (minute, key) DO UPDATE SET value = value + excluded.value',
+                    [(minute, key, value) for key, value in counter.result().items()])
+                if self.mode == EXACT_MODE:
+                    self.connection.executemany(
+                        'INSERT OR IGNORE INTO minute_visitors VALUES (?, ?)',
+                        [(minute, ip) for ip in visitors.values])
+                else:
+                    self._merge_sketch(minute, visitors)
+                self._merge_endpoints(minute, endpoint_stats)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO offsets VALUES (?, ?, ?)', (filepath, inode, offset))
+
+    def _merge_sketch(self, minute, visitors):
+        row = self.connection.execute('SELECT sketch FROM minute_sketches WHERE minute = ?', (minute,)).fetchone()
+        if row:
+            visitors.merge(load_cardinality_counter(zlib.decompress(row[0])))
+        # 한 분짜리 스케치는 대부분 0 이라 압축하면 크게 줄어든다
+        self.connection.execute('INSERT OR REPLACE INTO minute_sketches VALUES (?, ?)',
+                                (minute, zlib.compress(visitors.to_bytes())))
+
+    def _merge_endpoints(self, minute, endpoint_stats):
+        for endpoint, stat in endpoint_stats.endpoints.items():
+            row = self.connection.execute('SELECT stat FROM minute_endpoints WHERE minute = ? AND endpoint = ?',
+                                          (minute, endpoint)).fetchone()
+            if row:
+                stat.merge(EndpointStat.from_dict(json.loads(row[0])))
+            self.connection.execute('INSERT OR REPLACE INTO minute_endpoints VALUES (?, ?, ?)',
+                                    (minute, endpoint, json.dumps(stat.to_dict())))
+
+    def endpoint_stats(self, start_datetime: datetime, end_datetime: datetime = None):
+        start, end = to_minute(start_datetime), to_minute(end_datetime or datetime.max)
+        endpoint_stats = EndpointStats()
+        for endpoint, stat in self.connection.execute(
+                'SELECT endpoint, stat FROM minute_endpoints WHERE minute BETWEEN ? AND ?', (start, end)):
+            endpoint_stats.merge(EndpointStats.from_dict({endpoint: json.loads(stat)}))
+        return endpoint_stats
+
+    def visitors(self, start_datetime: datetime, end_datetime: datetime = None):
+        # 분 단위 스케치를 합쳐서 임의의 구간, 다른 작업자의 결과와도 합칠 수 있는 카운터를 만든다
+        start, end = to_minute(start_datetime), to_minute(end_datetime or datetime.max)
+        visitors = create_cardinality_counter(self.mode, self.error)
+        if self.mode == EXACT_MODE:
+            for ip, in self.connection.execute(
+                    'SELECT DISTINCT ip FROM minute_visitors WHERE minute BETWEEN ? AND ?', (start, end)):
+                visitors.add(ip)
+        else:
+            for sketch, in self.connection.execute(
+                    'SELECT sketch FROM minute_sketches WHERE minute BETWEEN ? AND ?', (start, end)):
+                visitors.merge(load_cardinality_counter(zlib.decompress(sketch)))
+        return visitors
+
+    def counts(self, start_datetime: datetime, end_datetime: datetime = None):
+        # 분 단위 버킷이라 시작 시각이 속한 분 전체를 포함한다
+        start, end = to_minute(start_datetime), to_minute(end_datetime or datetime.max)
+        counts = defaultdict(int)
+        for key, value in self.connection.execute(
+                'SELECT key, SUM(value) FROM minute_counts WHERE minute BETWEEN ? AND ? GROUP BY key', (start, end)):
+            counts[key] = value
+        return counts
+
+    def visitor_count(self, start_datetime: datetime, end_datetime: datetime = None) -> int:
+        if self.mode == EXACT_MODE:
+            start, end = to_minute(start_datetime), to_minute(end_datetime or datetime.max)
+            return self.connection.execute(
+                'SELECT COUNT(DISTINCT ip) FROM minute_visitors WHERE minute BETWEEN ? AND ?',
+                (start, end)).fetchone()[0]
+        return self.visitors(start_datetime, end_datetime).count()
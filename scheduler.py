@@ -0,0 +1,92 @@
+import threading
+import time
+
+from latency import LatencyHistogram
+
+COALESCE_SECONDS = 0.2
+POLL_INTERVAL_SECONDS = 5.0
+
+
+class EventScheduler:
+    def __init__(self, process, window=COALESCE_SECONDS, poll=None, poll_interval=POLL_INTERVAL_SECONDS):
+        self.process = process
+        self.window = window
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self.events = 0
+        self.processed = 0
+        self.failed = 0
+        # 첫 이벤트부터 처리가 끝나 알림이 큐에 들어가기까지 걸린 시간 (ms)
+        self.latency = LatencyHistogram()
+
+        # 파일 -> 처리하지 않은 첫 이벤트 시각
+        self._pending = dict()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, name='log-event-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        # 이미 받은 이벤트는 모두 처리한 뒤 종료
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self, path):
+        # watchdog 스레드는 기록만 하고 바로 돌아간다. 창 안에서 같은 파일의 이벤트는 한 번으로 합친다
+        with self._condition:
+            self.events += 1
+            if path not in self._pending:
+                self._pending[path] = time.monotonic()
+                self._condition.notify()
+
+    def stats(self) -> dict:
+        return {'events': self.events, 'processed': self.processed, 'failed': self.failed,
+                'latency_p50_ms': self.latency.quantile(0.5), 'latency_p99_ms': self.latency.quantile(0.99)}
+
+    def _work(self):
+        next_poll = time.monotonic() + self.poll_interval
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = [path for path, first_seen in self._pending.items()
+                           if self._stopping or now - first_seen >= self.window]
+                    if due or (self._stopping and not self._pending):
+                        break
+                    if self.poll is not None and now >= next_poll:
+                        break
+                    deadline = min(self._pending.values(), default=now + self.poll_interval) + self.window
+                    if self.poll is not None:
+                        deadline = min(deadline, next_poll)
+                    self._condition.wait(max(deadline - now, 0.001))
+                if self._stopping and not self._pending:
+                    return
+                batch = [(path, self._pending.pop(path)) for path in due]
+
+            if self.poll is not None and time.monotonic() >= next_poll:
+                # inotify 이벤트가 빠졌을 때를 대비해 주기적으로 모든 파일을 다시 확인한다
+                next_poll = time.monotonic() + self.poll_interval
+                try:
+                    polled = self.poll()
+                except Exception as e:
+                    print(f"로그 파일 확인 실패, 에러: {e}")
+                    polled = []
+                seen = {path for path, first_seen in batch}
+                batch.extend((path, None) for path in polled if path not in seen)
+
+            for path, first_seen in batch:
+                try:
+                    self.process(path)
+                    self.processed += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"로그 파일 처리 실패: {path}, 에러: {e}")
+                if first_seen is not None:
+                    self.latency.add((time.monotonic() - first_seen) * 1000)
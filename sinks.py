@@ -0,0 +1,371 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from datetime import datetime, timedelta
+
+from timestamps import TIMESTAMP_LENGTH, format_timestamp, has_timestamp
+
+BUFFER_BYTES = 64 * 1024
+FLUSH_INTERVAL_SECONDS = 1.0
+# never: 운영체제에 맡김, flush: 버퍼를 비울 때마다, close: 닫을 때만 디스크까지 내린다
+FSYNC_NEVER = 'never'
+FSYNC_FLUSH = 'flush'
+FSYNC_CLOSE = 'close'
+ROTATE_BACKUPS = 5
+# 버퍼가 buffer_bytes 의 이 배수까지 차면 쓰는 쪽이 기다려서라도 비운다
+BACKPRESSURE_BUFFERS = 16
+# 재처리로 거슬러 올라갈 수 있는 기간. 이보다 오래된 전송 기록은 지운다
+LEDGER_RETENTION_DAYS = int(os.getenv('SENT_LEDGER_RETENTION_DAYS', '30'))
+LEDGER_EXPIRE_INTERVAL_SECONDS = 3600
+
+
+class BufferedFileWriter:
+    # 이벤트마다 열고 닫지 않고 모아서 쓴다. 크기나 시간이 차면, 그리고 닫을 때 비운다
+    def __init__(self, path, buffer_bytes=BUFFER_BYTES, flush_interval=FLUSH_INTERVAL_SECONDS,
+                 fsync=FSYNC_NEVER, max_bytes=None, backups=ROTATE_BACKUPS, max_buffered=None):
+        if fsync not in (FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE):
+            raise ValueError(f"지원하지 않는 fsync 방식입니다: {fsync}")
+        self.path = path
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.backups = backups
+        # 비워 주는 스레드가 디스크를 못 따라올 때만 쓰는 쪽이 직접 비운다
+        self.max_buffered = max_buffered or buffer_bytes * BACKPRESSURE_BUFFERS
+        # 쓰는 스레드를 기다리게 하지 않고 비워 주는 스레드를 깨운다. 없으면 쓰는 쪽이 바로 비운다
+        self.wake = None
+        # 지금까지 받은 기록 수와 그중 파일에 쓴 수. 체크포인트는 그 전의 기록이 파일에 들어간 뒤에 저장한다
+        self.written = 0
+        self.flushed = 0
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._file = None
+        # _lock 은 버퍼만, _io_lock 은 파일 쓰기를 지킨다. 비우는 동안에도 write 는 버퍼에 계속 쌓을 수 있다
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, content):
+        with self._lock:
+            self._buffer.append(content)
+            self._buffered += len(content)
+            self.written += 1
+            buffered = self._buffered
+        if buffered >= self.max_buffered or (buffered >= self.buffer_bytes and self.wake is None):
+            self.flush()
+        elif buffered >= self.buffer_bytes:
+            self.wake()
+
+    def flush_due(self):
+        # 조용할 때도 마지막 기록이 오래 버퍼에 남지 않도록 주기적으로 불린다
+        with self._lock:
+            due = self._buffer and (self._buffered >= self.buffer_bytes
+                                    or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._io_lock:
+            self._flush()
+
+    def close(self):
+        with self._io_lock:
+            self._flush()
+            if self._file is not None:
+                if self.fsync != FSYNC_NEVER:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            data = ''.join(self._buffer)
+            written = self.written
+            self._buffer = []
+            self._buffered = 0
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        if self.max_bytes:
+            # 버퍼 단위로 돌리므로 한 번에 비우는 양이 max_bytes 보다 크면 그만큼은 넘을 수 있다
+            size = os.fstat(self._file.fileno()).st_size
+            if size and size + len(data.encode('utf-8')) > self.max_bytes:
+                self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync == FSYNC_FLUSH:
+            os.fsync(self._file.fileno())
+        self.flushed = written
+
+    def _rotate(self):
+        # analysis.txt -> analysis.txt.1 -> ... -> analysis.txt.N 순서로 밀고 가장 오래된 것은 버린다
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+
+class FileWriterPool:
+    # 파일 이름마다 BufferedFileWriter 를 하나씩 두고, 원하면 같은 기록을 JSONL 로도 남긴다
+    # start() 하면 디스크 쓰기는 전용 스레드가 맡고, write 는 버퍼에 넣기만 한다
+    def __init__(self, jsonl_path=None, **options):
+        self.options = options
+        self.flush_interval = options.get('flush_interval', FLUSH_INTERVAL_SECONDS)
+        self.writers = dict()
+        self.jsonl = BufferedFileWriter(jsonl_path, **options) if jsonl_path else None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='file-writer', daemon=True)
+        for writer in self._all_writers():
+            writer.wake = self._wake.set
+        self._thread.start()
+
+    def write(self, filename, content):
+        writer = self.writers.get(filename)
+        if writer is None:
+            with self._lock:
+                writer = self.writers.get(filename)
+                if writer is None:
+                    writer = BufferedFileWriter(filename, **self.options)
+                    if self._thread is not None:
+                        writer.wake = self._wake.set
+                    self.writers[filename] = writer
+        writer.write(content)
+        if self.jsonl is not None:
+            record = {'file': filename, 'text': content, 'written_at': datetime.now().isoformat(timespec='milliseconds')}
+            self.jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def mark(self):
+        return [(writer, writer.written) for writer in self._all_writers()]
+
+    def done(self, mark) -> bool:
+        # mark 이전에 받은 기록이 모두 파일에 들어갔는지
+        return all(writer.flushed >= written for writer, written in mark)
+
+    def flush_due(self):
+        for writer in self._all_writers():
+            try:
+                writer.flush_due()
+            except OSError as e:
+                print(f"파일 기록 저장 실패: {writer.path}, 에러: {e}")
+
+    def close(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        for writer in self._all_writers():
+            try:
+                writer.close()
+            except OSError as e:
+                print(f"파일 기록 저장 실패: {writer.path}, 에러: {e}")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush_due()
+
+    def _all_writers(self):
+        with self._lock:
+            writers = list(self.writers.values())
+        if self.jsonl is not None:
+            writers.append(self.jsonl)
+        return writers
+
+
+class SlackSink:
+    # 실시간 감시에서 쓰는 기본 출력. 메시지는 Slack 으로, 파일 기록은 버퍼를 거쳐 실제 파일로 간다
+    def __init__(self, slack, block=False, files=None):
+        self.slack = slack
+        # 재처리처럼 메시지가 한꺼번에 쏟아질 때는 큐가 비기를 기다려서 버리지 않는다
+        self.block = block
+        self.files = files if files is not None else FileWriterPool()
+
+    def send(self, channel, text, blocks=None):
+        return self.slack.send(channel, text, block=self.block, blocks=blocks)
+
+    def append(self, filename, content):
+        self.files.write(filename, content)
+
+    def mark(self):
+        return self.slack.mark(), self.files.mark()
+
+    def done(self, mark) -> bool:
+        # mark 이전에 넣은 메시지가 모두 전송되었거나 포기되었고, 파일 기록도 모두 파일에 들어갔는지
+        slack_mark, files_mark = mark
+        return self.slack.done(slack_mark) and self.files.done(files_mark)
+
+    def close(self):
+        self.files.close()
+
+
+class DryRunSink:
+    # 보내거나 쓰지 않고 무엇이 나갈지만 모은다
+    def __init__(self):
+        self.messages = []
+        self.files = []
+
+    def send(self, channel, text, blocks=None):
+        self.messages.append((channel, text))
+        return True
+
+    def append(self, filename, content):
+        self.files.append((filename, content))
+
+    def mark(self):
+        return None
+
+    def done(self, mark) -> bool:
+        return True
+
+    def close(self):
+        print(f"보낼 메시지 {len(self.messages)}건, 파일 기록 {len(self.files)}건")
+
+
+class FileSink:
+    # 메시지와 파일 기록을 한 JSONL 파일에 순서대로 남긴다
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def send(self, channel, text, blocks=None):
+        record = {'channel': channel, 'text': text}
+        if blocks is not None:
+            record['blocks'] = blocks
+        self._write(record)
+        return True
+
+    def append(self, filename, content):
+        self._write({'file': filename, 'text': content})
+
+    def mark(self):
+        return None
+
+    def done(self, mark) -> bool:
+        return True
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class SentLedger:
+    # 이미 처리한 로그 줄의 기록 시각과 지문. 실시간 감시와 재처리가 같은 파일에 남겨서 어느 쪽이 보낸 알림도 다시 보내지 않는다
+    def __init__(self, path=None, retention_days=LEDGER_RETENTION_DAYS, read_only=False):
+        self.path = path
+        self.retention = timedelta(days=retention_days)
+        self.read_only = read_only
+        # 지문 -> 줄의 기록 시각. 보존 기간보다 오래된 줄은 열 때와 주기적으로 지운다
+        self.keys = dict()
+        self._file = None
+        self._next_expire = time.monotonic() + LEDGER_EXPIRE_INTERVAL_SECONDS
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+            if not read_only:
+                self._compact()
+
+    def __contains__(self, line) -> bool:
+        return self.key(line) in self.keys
+
+    def horizon(self) -> str:
+        return format_timestamp(datetime.now() - self.retention)
+
+    def add(self, line):
+        key = self.key(line)
+        timestamp = line[:TIMESTAMP_LENGTH] if has_timestamp(line) else format_timestamp(datetime.now())
+        with self._lock:
+            self.keys[key] = timestamp
+            if self._file is not None:
+                # 다른 프로세스가 파일을 정리해 바꿔 놓았으면 새 파일에 이어 쓴다
+                if self._replaced():
+                    self._file.close()
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(f"{timestamp}\t{key}\n")
+                self._file.flush()
+            if time.monotonic() >= self._next_expire:
+                self._expire()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _expire(self):
+        if self._file is not None:
+            self._compact()
+            return
+        horizon = self.horizon()
+        self.keys = {key: timestamp for key, timestamp in self.keys.items() if timestamp >= horizon}
+        self._next_expire = time.monotonic() + LEDGER_EXPIRE_INTERVAL_SECONDS
+
+    def _load(self):
+        # 정리할 때도 파일을 다시 읽어서, 같은 파일에 쓰는 다른 프로세스의 기록을 잃지 않는다
+        horizon = self.horizon()
+        keys = dict()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for entry in f:
+                    timestamp, _, key = entry.strip().rpartition('\t')
+                    if not key:
+                        continue
+                    # 시각 없이 지문만 남은 예전 기록은 한 보존 기간 동안 더 둔다
+                    timestamp = timestamp or format_timestamp(datetime.now())
+                    if timestamp >= horizon:
+                        keys[key] = timestamp
+        self.keys = keys
+
+    def _compact(self):
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(self.path):
+            self._load()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{timestamp}\t{key}\n" for key, timestamp in self.keys.items())
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._next_expire = time.monotonic() + LEDGER_EXPIRE_INTERVAL_SECONDS
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def key(line) -> str:
+        return hashlib.blake2b(line.strip().encode('utf-8'), digest_size=16).hexdigest()
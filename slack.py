@@ -0,0 +1,219 @@
+import queue
+import threading
+import time
+
+import requests
+
+from latency import LatencyHistogram
+
+SLACK_API_URL = 'https://slack.com/api/chat.postMessage'
+
+QUEUE_SIZE = 1000
+# chat.postMessage 는 채널당 초당 1건 정도까지 허용된다
+CHANNEL_INTERVAL_SECONDS = 1.0
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+MAX_TEXT_LENGTH = 35000
+
+
+class SlackDelivery:
+    def __init__(self, token, url=SLACK_API_URL, workers=1, queue_size=QUEUE_SIZE,
+                 channel_interval=CHANNEL_INTERVAL_SECONDS, coalesce_window=0.0,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+        self.token = token
+        self.url = url
+        self.workers = workers
+        self.channel_interval = channel_interval
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dropped = 0
+        self.failed = 0
+        self.sent = 0
+        # 성공한 요청 한 번의 왕복 시간 (ms)
+        self.latency = LatencyHistogram()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._session = requests.Session()
+        self._session.headers.update({
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        })
+        self._next_send = dict()
+        self._lock = threading.Lock()
+        self._threads = []
+        # 큐에 넣을 때 붙이는 번호와, 아직 보내거나 포기하지 않은 번호들
+        self._sequence = 0
+        self._unfinished = set()
+        self._progress_lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'slack-delivery-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10.0):
+        # 남은 메시지를 보낸 뒤 종료
+        for _ in self._threads:
+            self._queue.put(None)
+        # timeout 이 None 이면 큐가 다 비워질 때까지 기다린다
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def send(self, channel, text, block=False, blocks=None) -> bool:
+        # 로그 처리 스레드는 절대 네트워크를 기다리지 않는다
+        with self._progress_lock:
+            self._sequence += 1
+            sequence = self._sequence
+            self._unfinished.add(sequence)
+        try:
+            self._queue.put((sequence, channel, text, blocks), block=block)
+            return True
+        except queue.Full:
+            self._finish([sequence])
+            self.dropped += 1
+            print(f"Slack 전송 큐가 가득 차서 메시지를 버립니다: {channel}")
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def mark(self) -> int:
+        # 지금까지 넣은 메시지의 번호. done(mark) 가 참이 되면 그 전 메시지는 모두 보냈거나 포기한 것이다
+        with self._progress_lock:
+            return self._sequence
+
+    def done(self, mark) -> bool:
+        with self._progress_lock:
+            return min(self._unfinished, default=mark + 1) > mark
+
+    def _finish(self, sequences):
+        with self._progress_lock:
+            self._unfinished.difference_update(sequences)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            if self.coalesce_window > 0:
+                stopping = self._collect(batch)
+            for sequences, channel, text, blocks in self._coalesce(batch):
+                self._deliver(channel, text, blocks)
+                # 실패해서 포기한 메시지도 끝난 것으로 본다. 건수는 failed 로 남는다
+                self._finish(sequences)
+            if stopping:
+                return
+
+    def _collect(self, batch) -> bool:
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+
+    def _coalesce(self, batch):
+        # (합친 메시지들의 번호, 채널, 내용, 블록)
+        texts = dict()
+        for sequence, channel, text, blocks in batch:
+            if blocks is not None:
+                # Block Kit 메시지는 합치지 않고 그대로 보낸다
+                yield [sequence], channel, text, blocks
+            else:
+                texts.setdefault(channel, []).append((sequence, text))
+        for channel, channel_texts in texts.items():
+            sequences, chunk = [channel_texts[0][0]], channel_texts[0][1]
+            for sequence, text in channel_texts[1:]:
+                if len(chunk) + len(text) + 2 > MAX_TEXT_LENGTH:
+                    yield sequences, channel, chunk, None
+                    sequences, chunk = [], text
+                else:
+                    chunk = f"{chunk}\n\n{text}"
+                sequences.append(sequence)
+            yield sequences, channel, chunk, None
+
+    def _wait_for_slot(self, channel):
+        with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_send.get(channel, now))
+            self._next_send[channel] = send_at + self.channel_interval
+        if send_at > now:
+            time.sleep(send_at - now)
+
+    def _defer_channel(self, channel, seconds):
+        with self._lock:
+            self._next_send[channel] = max(self._next_send.get(channel, 0.0), time.monotonic() + seconds)
+
+    def _deliver(self, channel, text, blocks=None) -> bool:
+        payload = {
+            'channel': channel,
+            'text': text
+        }
+        if blocks is not None:
+            payload['blocks'] = blocks
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot(channel)
+            delay = min(self.backoff * 2 ** attempt, MAX_BACKOFF_SECONDS)
+            began = time.monotonic()
+            try:
+                response = self._session.post(self.url, json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
+            except requests.RequestException as e:
+                print(f"Slack 전송 실패 (시도 {attempt + 1}): {e}")
+                self._defer_channel(channel, delay)
+                continue
+
+            if response.status_code == 429:
+                self._defer_channel(channel, _retry_after(response, delay))
+                continue
+            if response.status_code >= 500:
+                self._defer_channel(channel, delay)
+                continue
+
+            # chat.postMessage 는 토큰이나 채널 오류도 200 에 {"ok": false} 로 돌려준다. 다시 보내도 같으므로 재시도하지 않는다
+            error = _slack_error(response)
+            if error is not None:
+                self.failed += 1
+                print(f"Slack 전송 거부: {channel}, 에러: {error}")
+                return False
+            self.sent += 1
+            self.latency.add((time.monotonic() - began) * 1000)
+            print(response.text)
+            return True
+
+        self.failed += 1
+        print(f"Slack 전송 포기: {channel}")
+        return False
+
+
+def _slack_error(response):
+    # 실패면 이유를, 성공이면 None. Incoming Webhook 은 JSON 대신 'ok' 문자열을 돌려준다
+    if response.status_code >= 300:
+        return f"HTTP {response.status_code} {response.text[:200]}"
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict) and body.get('ok') is False:
+        return body.get('error', 'unknown_error')
+    return None
+
+
+def _retry_after(response, default) -> float:
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return default
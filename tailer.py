@@ -0,0 +1,86 @@
+import os
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LogTailer:
+    def __init__(self, path, offset=None, inode=None):
+        self.path = path
+        # offset 은 마지막으로 완성된 줄의 끝 위치 (미완성 줄은 포함하지 않음)
+        self.offset = offset
+        self.inode = inode
+        self._file = None
+        self._partial = b''
+
+    def read_lines(self):
+        if self._file is None:
+            if not self._open():
+                return
+        elif self._rotated():
+            # 로테이션된 이전 파일에 남은 내용을 먼저 모두 읽는다
+            yield from self._drain()
+            if self._partial:
+                yield self._partial.decode('utf-8', errors='replace') + '\n'
+            self.close()
+            if not self._open(from_start=True):
+                return
+
+        if os.fstat(self._file.fileno()).st_size < self.offset + len(self._partial):
+            # 파일이 잘렸으면 처음부터 다시 읽는다
+            self._file.seek(0)
+            self.offset = 0
+            self._partial = b''
+
+        yield from self._drain()
+
+    def flush_partial(self):
+        # 더 이상 쓰이지 않는 파일의 개행 없는 마지막 줄을 완성된 줄로 취급
+        if not self._partial:
+            return None
+        line = self._partial.decode('utf-8', errors='replace') + '\n'
+        self.offset += len(self._partial)
+        self._partial = b''
+        return line
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._partial = b''
+
+    def _open(self, from_start=False) -> bool:
+        try:
+            self._file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        stat = os.fstat(self._file.fileno())
+        if from_start or (self.inode is not None and self.inode != stat.st_ino):
+            self.offset = 0
+        elif self.offset is None:
+            # 처음 보는 파일은 끝에서부터 감시
+            self.offset = stat.st_size
+        elif self.offset > stat.st_size:
+            self.offset = 0
+
+        self.inode = stat.st_ino
+        self._partial = b''
+        self._file.seek(self.offset)
+        return True
+
+    def _rotated(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def _drain(self):
+        while True:
+            chunk = self._file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            lines = (self._partial + chunk).split(b'\n')
+            self._partial = lines.pop()
+            for raw in lines:
+                self.offset += len(raw) + 1
+                yield raw.decode('utf-8', errors='replace') + '\n'
@@ -0,0 +1,51 @@
+import time
+
+from datetime import datetime
+
+import pytz
+
+KST = pytz.timezone('Asia/Seoul')
+# Slack section 블록의 mrkdwn 텍스트 최대 길이
+MAX_SECTION_LENGTH = 3000
+
+
+class MessageTemplate:
+    # 정책 문구처럼 실행 중에 바뀌지 않는 값은 만들 때 한 번만 채우고, 보낼 때는 str.format 한 번으로 끝낸다
+    def __init__(self, text, **static):
+        self._compiled = text.format_map(_KeepMissing(
+            {name: str(value).replace('{', '{{').replace('}', '}}') for name, value in static.items()}))
+
+    def render(self, **values) -> str:
+        return self._compiled.format(**values)
+
+
+class _KeepMissing(dict):
+    def __missing__(self, name):
+        return '{' + name + '}'
+
+
+class KstClock:
+    # 같은 초 안의 알림은 이미 만든 시각 문자열을 다시 쓴다
+    def __init__(self, timezone=KST, date_format='%Y-%m-%d %H:%M:%S'):
+        self.timezone = timezone
+        self.date_format = date_format
+        self._cached = (None, None)
+
+    def now(self) -> str:
+        second = int(time.time())
+        cached_second, text = self._cached
+        if cached_second != second:
+            text = datetime.fromtimestamp(second, self.timezone).strftime(self.date_format)
+            self._cached = (second, text)
+        return text
+
+
+def to_blocks(text) -> list:
+    # 빈 줄로 나뉜 문단을 Block Kit section 으로 옮긴다. 알림 미리보기에는 text 가 그대로 쓰인다
+    blocks = []
+    for paragraph in text.split('\n\n'):
+        paragraph = '\n'.join(line.strip() for line in paragraph.strip('\n').split('\n')).strip()
+        while paragraph:
+            blocks.append({'type': 'section', 'text': {'type': 'mrkdwn', 'text': paragraph[:MAX_SECTION_LENGTH]}})
+            paragraph = paragraph[MAX_SECTION_LENGTH:]
+    return blocks
@@ -0,0 +1,26 @@
+import pytest
+
+from aggregators import Aggregator, VisitorCounter
+
+
+def test_aggregator_without_merge_fails_on_creation():
+    class FeedOnly(Aggregator):
+        def feed(self, line):
+            pass
+
+        def result(self):
+            return None
+
+    with pytest.raises(TypeError):
+        FeedOnly()
+
+
+def test_visitor_counter_merges_partial_counts():
+    left, right = VisitorCounter(), VisitorCounter()
+    request = ('2025-05-18 01:36:18.703 [http-nio-9011-exec-1]  INFO com.yourssu.signal.config.filter.LoggingFilter - '
+               '{{"Request":{{"Method":"GET /api/viewers - 0ms","Headers":{{"x-real-ip":"{ip}"}}}}}}')
+    left.feed(request.format(ip='1.1.1.1'))
+    right.feed(request.format(ip='1.1.1.1'))
+    right.feed(request.format(ip='2.2.2.2'))
+    left.merge(right)
+    assert left.result() == 2
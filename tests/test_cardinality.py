@@ -0,0 +1,46 @@
+import pytest
+
+from cardinality import DEFAULT_ERROR, ExactCounter, HyperLogLog, load_cardinality_counter
+
+# 표준 오차의 세 배. 고정된 입력이라 결과는 매번 같다
+MAX_RELATIVE_ERROR = 3 * DEFAULT_ERROR
+COUNTS = (100, 10000, 200000)
+
+
+def ip_addresses(count, offset=0):
+    return [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(offset, offset + count)]
+
+
+def relative_error(estimate, exact) -> float:
+    return abs(estimate - exact) / exact
+
+
+@pytest.mark.parametrize('count', COUNTS)
+def test_hll_matches_exact_count(count):
+    ips = ip_addresses(count)
+    sketch = HyperLogLog()
+    for ip in ips + ips[:count // 2]:
+        sketch.add(ip)
+    assert relative_error(sketch.count(), ExactCounter(ips).count()) <= MAX_RELATIVE_ERROR
+
+
+@pytest.mark.parametrize('count', COUNTS)
+def test_merged_partial_sketches_match_exact_count(count):
+    # 작업자마다 따로 센 스케치를 직렬화해서 합쳐도, 겹치는 방문자가 있어도 정확도가 유지된다
+    ips = ip_addresses(count)
+    parts = [HyperLogLog() for _ in range(4)]
+    exact_parts = [ExactCounter() for _ in range(4)]
+    for i, ip in enumerate(ips + ips[:count // 4]):
+        parts[i % 4].add(ip)
+        exact_parts[i % 4].add(ip)
+    merged, exact = parts[0], exact_parts[0]
+    for part, exact_part in zip(parts[1:], exact_parts[1:]):
+        merged.merge(load_cardinality_counter(part.to_bytes()))
+        exact.merge(load_cardinality_counter(exact_part.to_bytes()))
+    assert exact.count() == count
+    assert relative_error(merged.count(), count) <= MAX_RELATIVE_ERROR
+
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
@@ -0,0 +1,21 @@
+import json
+
+from checkpoint import CheckpointStore
+
+
+def test_checkpoints_survive_reload(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    store = CheckpointStore(path, flush_interval=60)
+    store.update('/logs/0.log', 11, 120, '2025-05-18 20:00:00.000')
+    store.flush()
+
+    reloaded = CheckpointStore(path)
+    assert reloaded.get('/logs/0.log') == {'inode': 11, 'offset': 120, 'timestamp': '2025-05-18 20:00:00.000'}
+    assert reloaded.since == json.loads(open(path, encoding='utf-8').read())['saved_at']
+
+
+def test_broken_checkpoint_file_starts_empty(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    path.write_text('{"files": ')
+    store = CheckpointStore(str(path))
+    assert store.checkpoints == {}
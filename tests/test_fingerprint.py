@@ -0,0 +1,31 @@
+from fingerprint import ErrorStormGuard
+
+
+def test_repeats_are_summarized_after_interval():
+    guard = ErrorStormGuard(window=600, summary_interval=300)
+    assert guard.record('timeout for user 1', now=0)
+    assert not guard.record('timeout for user 2', now=10)
+    assert guard.due_summaries(now=100) == []
+    assert guard.due_summaries(now=300) == [('timeout for user 1', 1, 5)]
+    assert guard.due_summaries(now=400) == []
+
+
+def test_evicted_fingerprint_keeps_suppressed_count():
+    guard = ErrorStormGuard(window=600, summary_interval=300, max_fingerprints=1)
+    guard.record('timeout for user 1', now=0)
+    guard.record('timeout for user 2', now=10)
+    guard.record('timeout for user 3', now=20)
+    assert guard.record('disk full', now=30)
+
+    # 요약 주기 전이라도 밀려난 지문의 건수는 바로 내보낸다
+    assert guard.due_summaries(now=40) == [('timeout for user 1', 2, 1)]
+    assert guard.suppressed == 2
+
+
+def test_expired_window_keeps_suppressed_count():
+    guard = ErrorStormGuard(window=600, summary_interval=300)
+    guard.record('timeout for user 1', now=0)
+    guard.record('timeout for user 2', now=10)
+    # 요약을 꺼내기 전에 창이 지나 새 알림이 나가도 묶어 둔 건수는 남는다
+    assert guard.record('timeout for user 3', now=1000)
+    assert guard.due_summaries(now=1000) == [('timeout for user 1', 1, 17)]
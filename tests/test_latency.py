@@ -0,0 +1,61 @@
+import math
+import random
+
+import pytest
+
+from latency import RELATIVE_ACCURACY, EndpointStat, LatencyHistogram
+
+
+def exact_quantile(values, q):
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+def assert_close(estimate, actual):
+    # 버킷은 (값 + 1) 에 상대 오차를 보장하고, 결과는 ms 정수로 반올림된다
+    assert abs(estimate - actual) <= RELATIVE_ACCURACY * (actual + 1) + 0.5
+
+
+@pytest.mark.parametrize('q', [0.5, 0.9, 0.95, 0.99])
+def test_quantiles_within_relative_accuracy(q):
+    rng = random.Random(q)
+    values = [round(rng.lognormvariate(4, 1.2)) for _ in range(20000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+    assert_close(histogram.quantile(q), exact_quantile(values, q))
+
+
+def test_merged_histograms_match_one_histogram():
+    rng = random.Random(1)
+    values = [rng.randint(0, 60000) for _ in range(10000)]
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 3 else right).add(value)
+    left.merge(right)
+    assert left.buckets == whole.buckets and left.count == whole.count
+    for q in (0.5, 0.99):
+        assert_close(left.quantile(q), exact_quantile(values, q))
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        LatencyHistogram(0.02).merge(LatencyHistogram(0.05))
+
+
+def test_endpoint_stat_round_trips_through_dict():
+    stat = EndpointStat()
+    for latency_ms, status in ((12, 200), (300, 404), (900, 503)):
+        stat.add(latency_ms, status)
+    restored = EndpointStat.from_dict(stat.to_dict())
+    assert (restored.count, restored.client_errors, restored.server_errors) == (3, 1, 1)
+    assert restored.histogram.quantile(0.5) == stat.histogram.quantile(0.5)
+
+
+def test_sum_is_kept_through_merge_and_dict():
+    left, right = LatencyHistogram(), LatencyHistogram()
+    left.add(10)
+    right.add(25, count=2)
+    left.merge(right)
+    assert (left.sum, left.count) == (60, 3)
+    assert LatencyHistogram.from_dict(left.to_dict()).sum == 60
@@ -0,0 +1,50 @@
+import time
+
+from datetime import datetime
+
+from live import AlertRule, LiveStats, RingCounter, RingDistinct
+from timestamps import format_timestamp
+
+REPLY = ('{timestamp} [http-nio-9011-exec-1]  INFO com.yourssu.signal.config.filter.LoggingFilter - '
+         '{{"Reply":{{"Method":"GET /api/viewers/uuid - 5ms","Status":{status}}}}}')
+
+
+def test_ring_counter_drops_buckets_outside_window():
+    ring = RingCounter(window_seconds=60, bucket_seconds=10)
+    ring.add(1000)
+    ring.add(1035)
+    assert ring.total(1040) == 2
+    assert ring.total(1065) == 1
+    assert ring.total(1100) == 0
+
+
+def test_ring_counter_ignores_future_buckets_until_due():
+    ring = RingCounter(window_seconds=60, bucket_seconds=10)
+    ring.add(1000)
+    ring.add(1500)
+    assert ring.total(1005) == 1
+    assert ring.total(1505) == 1
+
+
+def test_ring_distinct_counts_each_visitor_once():
+    ring = RingDistinct(window_seconds=60, bucket_seconds=10)
+    for second, ip in ((1000, 'a'), (1010, 'a'), (1020, 'b'), (1100, 'c')):
+        ring.add(second, ip)
+    assert ring.count(1025) == 2
+    assert ring.count(1075) == 1
+
+
+def test_future_reply_does_not_push_last_request_ahead():
+    stats = LiveStats()
+    stats.feed(REPLY.format(timestamp=format_timestamp(datetime(2099, 1, 1)), status=200))
+    assert stats.last_request_at <= time.time()
+
+
+def test_alert_rule_reports_only_transitions():
+    details = {0: None, 1: 'high', 2: 'higher', 3: None}
+    rule = AlertRule('error_rate', details.get)
+    assert rule.evaluate(0) is None
+    assert rule.evaluate(1) == (True, 'high')
+    assert rule.evaluate(2) is None
+    assert rule.evaluate(3) == (False, None)
+    assert rule.evaluate(3) is None
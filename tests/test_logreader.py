@@ -0,0 +1,104 @@
+import gzip
+import os
+
+from datetime import datetime
+from functools import partial
+
+import pytest
+
+import logreader
+import timeindex
+from loggen import generate_lines
+from timestamps import TimeWindow
+
+
+@pytest.fixture
+def gz_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(logreader, 'index_path_for', partial(timeindex.index_path_for, index_dir=str(tmp_path / 'index')))
+    # 블록이 여러 개 생기도록 작게 자른다
+    monkeypatch.setattr(logreader, 'BLOCK_BYTES', 4096)
+    lines = [f"2025-05-18 {hour:02d}:{minute:02d}:00.000 [main]  INFO logger - line {hour} {minute}\n"
+             for hour in range(24) for minute in range(60)]
+    path = tmp_path / '0.log.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.writelines(lines)
+    return str(path), lines
+
+
+def test_compressed_log_is_decompressed_only_once(gz_log, monkeypatch):
+    path, lines = gz_log
+    window = TimeWindow(datetime(2025, 5, 18, 10, 30), datetime(2025, 5, 18, 11, 15))
+    expected = [line for line in lines if window.contains(line)]
+
+    assert list(logreader.iter_compressed_lines(path, window)) == expected
+    blocks = logreader.load_blocks(path)
+    assert len(blocks) > 10
+
+    def fail(filepath):
+        raise AssertionError('압축 파일을 다시 풀었습니다')
+
+    monkeypatch.setattr(logreader, 'open_log', fail)
+    assert list(logreader.iter_compressed_lines(path, window)) == expected
+    assert list(logreader.iter_compressed_lines(path, window, ['line 11 '])) == [
+        line for line in expected if 'line 11 ' in line]
+
+
+def test_partial_read_leaves_no_block_cache(gz_log):
+    path, lines = gz_log
+    reader = logreader.iter_compressed_lines(path, TimeWindow())
+    next(reader)
+    reader.close()
+    assert logreader.load_blocks(path) is None
+    assert len(list(logreader.iter_compressed_lines(path, TimeWindow()))) == len(lines)
+
+
+@pytest.mark.parametrize('markers', [None, ['Notification'], ['Issued ticket', 'POST /api/profiles']])
+@pytest.mark.parametrize('window', [(datetime(2025, 5, 18), None),
+                                    (datetime(2025, 5, 18, 0, 0, 30, 500), datetime(2025, 5, 18, 0, 1, 10))])
+def test_mmap_engine_matches_text_engine(tmp_path, markers, window):
+    directory = tmp_path / '2025-05-18'
+    directory.mkdir()
+    text = ''.join(line for stamp, line in generate_lines(5000, datetime(2025, 5, 18), notification_ratio=0.05,
+                                                          malformed_ratio=0.01, seed=2))
+    # 개행 없이 끝나는 마지막 줄과 한글 메시지도 같아야 한다
+    (directory / '0.log').write_text(text + '2025-05-18 00:01:05.000 [main]  INFO logger - 끝 Notification',
+                                     encoding='utf-8')
+
+    def read(engine):
+        return list(logreader.iter_lines_between(*window, root=str(tmp_path), use_index=False,
+                                                 engine=engine, markers=markers))
+
+    text_lines = read(logreader.TEXT_ENGINE)
+    assert text_lines
+    assert read(logreader.MMAP_ENGINE) == text_lines
+
+
+def test_block_cache_of_deleted_archive_is_pruned(gz_log, tmp_path):
+    path, lines = gz_log
+    list(logreader.iter_compressed_lines(path, TimeWindow()))
+    other = tmp_path / '1.log.gz'
+    with gzip.open(other, 'wt', encoding='utf-8') as f:
+        f.writelines(lines[:10])
+
+    os.remove(path)
+    list(logreader.iter_compressed_lines(str(other), TimeWindow()))
+    assert sorted(os.listdir(tmp_path / 'index')) == sorted(
+        os.path.basename(logreader.index_path_for(str(other), suffix=suffix))
+        for suffix in (logreader.BLOCKS_SUFFIX, logreader.BLOCK_INDEX_SUFFIX))
+
+
+def test_block_cache_over_limit_drops_least_recently_used(gz_log, tmp_path):
+    path, lines = gz_log
+    list(logreader.iter_compressed_lines(path, TimeWindow()))
+    index_path = logreader.index_path_for(path, suffix=logreader.BLOCK_INDEX_SUFFIX)
+    os.utime(index_path, (0, 0))
+    other = tmp_path / '1.log.gz'
+    with gzip.open(other, 'wt', encoding='utf-8') as f:
+        f.writelines(lines[:10])
+    list(logreader.iter_compressed_lines(str(other), TimeWindow()))
+
+    # 최근에 쓴 캐시 하나만 남을 만큼으로 줄인다
+    newest_size = os.path.getsize(logreader.index_path_for(str(other), suffix=logreader.BLOCKS_SUFFIX))
+    logreader.prune_block_cache(str(tmp_path / 'index'), max_bytes=newest_size)
+    assert logreader.load_blocks(path) is None
+    assert logreader.load_blocks(str(other)) is not None
@@ -0,0 +1,10 @@
+from metrics import MetricsRegistry
+
+
+def test_summary_exposes_sum_and_count():
+    registry = MetricsRegistry()
+    for value_ms in (10, 20, 30):
+        registry.observe('observer_event_latency_ms', value_ms, handler='check')
+    lines = registry.render().splitlines()
+    assert 'observer_event_latency_ms_sum{handler="check"} 60' in lines
+    assert 'observer_event_latency_ms_count{handler="check"} 3' in lines
@@ -0,0 +1,149 @@
+import os
+import time
+
+from datetime import datetime, timedelta
+
+import pytest
+
+os.environ.setdefault('ENVIRONMENT', 'test')
+os.environ.setdefault('TICKET_PRICE_POLICY', '1000n1')
+os.environ.setdefault('TICKET_PRICE_REGISTERED_POLICY', '500n1')
+os.environ.setdefault('CHECKPOINT_PATH', os.devnull)
+
+import observer  # noqa: E402
+from checkpoint import CheckpointStore  # noqa: E402
+from dedupe import EventDeduper  # noqa: E402
+from sinks import DryRunSink, SentLedger  # noqa: E402
+from timestamps import format_timestamp  # noqa: E402
+
+LINE = '2025-05-18 20:00:00.000 [main]  INFO logger - hello\n'
+TICKET = ' [exec-1]  INFO com.yourssu.signal.infrastructure.Notification - Issued ticket&5374 4b3ab213 4 22'
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(observer, 'sink', DryRunSink())
+    monkeypatch.setattr(observer, 'tailers', dict())
+    monkeypatch.setattr(observer, 'last_read_at', dict())
+    monkeypatch.setattr(observer.checkpoints, 'path', str(tmp_path / 'checkpoint.json'))
+    monkeypatch.setattr(observer.checkpoints, 'checkpoints', dict())
+    monkeypatch.setattr(observer.checkpoints, 'since', 0)
+    monkeypatch.setattr(observer, 'pending_checkpoints', observer.deque())
+    return tmp_path / 'logs'
+
+
+def write_log(path, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(LINE)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path.resolve())
+
+
+def test_poll_skips_old_days_and_closes_idle_tailers(logs):
+    old = write_log(logs / '2025-05-17' / '0.log', time.time() - 2 * 86400)
+    today = write_log(logs / '2025-05-18' / '0.log')
+    observer.catch_up(str(logs))
+    assert set(observer.tailers) == {old, today}
+
+    assert observer.list_recent_log_files(str(logs)) == [today]
+    assert set(observer.tailers) == {today}
+    assert observer.checkpoints.get(old)['offset'] == len(LINE)
+
+
+def test_tailer_with_unsaved_checkpoint_is_kept(logs):
+    old = write_log(logs / '2025-05-17' / '0.log', time.time() - 2 * 86400)
+    observer.check(old)
+    observer.list_recent_log_files(str(logs))
+    assert old in observer.tailers
+
+
+def ticket_line(when):
+    return format_timestamp(when) + TICKET
+
+
+def test_live_dispatch_is_recorded_for_replay(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ledger.txt')
+    monkeypatch.setattr(observer, 'sink', DryRunSink())
+    monkeypatch.setattr(observer, 'deduper', EventDeduper())
+    monkeypatch.setattr(observer, 'ledger', SentLedger(path))
+    line = ticket_line(datetime.now())
+    observer.dispatch(line)
+    observer.ledger.close()
+    assert line in SentLedger(path, read_only=True)
+
+
+def test_ledger_expires_entries_past_retention(tmp_path):
+    path = str(tmp_path / 'ledger.txt')
+    old = ticket_line(datetime.now() - timedelta(days=31))
+    recent = ticket_line(datetime.now())
+    ledger = SentLedger(path, retention_days=30)
+    ledger.add(old)
+    ledger.add(recent)
+    ledger.close()
+
+    reopened = SentLedger(path, retention_days=30)
+    reopened.close()
+    assert old not in reopened and recent in reopened
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+
+def test_consumed_tickets_are_counted_without_handler(monkeypatch):
+    monkeypatch.setattr(observer, 'sink', DryRunSink())
+    monkeypatch.setattr(observer, 'live', observer.LiveStats())
+    now = datetime.now()
+    observer.dispatch(format_timestamp(now) + ' [exec-1]  ' + observer.CONSUME_TICKET_PREFIX + '&홍길동 1')
+    assert observer.live.snapshot(now.timestamp())['events'] == {observer.TICKETS_CONSUMED_EVENT: 1}
+    assert observer.sink.messages == []
+
+
+def test_catch_up_after_restart_reads_only_new_lines(logs, monkeypatch):
+    path = write_log(logs / '2025-05-18' / '0.log')
+    dispatched = []
+    monkeypatch.setattr(observer, 'dispatch', dispatched.append)
+    observer.catch_up(str(logs))
+    assert dispatched == [LINE]
+
+    # 멈춰 있는 동안 쌓인 줄만 다시 시작할 때 처리한다
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(LINE.replace('hello', 'while down'))
+    monkeypatch.setattr(observer, 'checkpoints', CheckpointStore(observer.checkpoints.path))
+    monkeypatch.setattr(observer, 'tailers', dict())
+    dispatched.clear()
+    observer.catch_up(str(logs))
+    assert dispatched == [LINE.replace('hello', 'while down')]
+    assert observer.checkpoints.get(path)['offset'] == os.path.getsize(path)
+
+
+def error_line(when, message):
+    return f"{format_timestamp(when)} [exec-1] {observer.INTERNAL_ERROR_LOG_PREFIX} {message}\n"
+
+
+def test_replay_groups_error_storms_by_log_time(logs, monkeypatch):
+    import replay
+    from fingerprint import ErrorStormGuard
+
+    monkeypatch.setattr(observer, 'deduper', EventDeduper())
+    monkeypatch.setattr(observer, 'error_guard', ErrorStormGuard(window=600, summary_interval=300))
+    monkeypatch.setattr(observer, 'error_clock', None)
+    monkeypatch.setattr(observer, 'ledger', observer.ledger)
+    start = datetime(2025, 5, 18, 1)
+    storm = [error_line(start + timedelta(minutes=minute), f'timeout on order {minute}') for minute in (0, 1, 2)]
+    later = error_line(start + timedelta(minutes=30), 'timeout on order 30')
+    path = logs / '2025-05-18' / '0.log'
+    path.parent.mkdir(parents=True)
+    path.write_text(''.join(storm) + later)
+
+    sink = DryRunSink()
+    ledger = SentLedger(str(logs / 'ledger.txt'))
+    replay.replay(start, start + timedelta(hours=1), sink, ledger, str(logs))
+    ledger.close()
+
+    texts = [text for _, text in sink.messages]
+    assert len(texts) == 3
+    assert 'order 0' in texts[0]
+    assert '2건 더 발생' in texts[1]
+    assert 'order 30' in texts[2]
+    assert storm[0] in ledger and later in ledger
+    assert storm[1] not in ledger and storm[2] not in ledger
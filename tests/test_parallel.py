@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import report
+from aggregators import feed_all
+from logreader import iter_lines_between
+from parallel import scan_parallel
+
+TICKET = ('2025-05-18 20:{minute:02d}:00.000 [exec-1]  INFO com.yourssu.signal.infrastructure.Notification - '
+          'Issued ticket&{verification} 4b3ab213 4 22\n')
+FILLER = '2025-05-18 20:{minute:02d}:30.000 [exec-2]  INFO logger - hello\n'
+
+
+def test_duplicates_across_ranges_are_counted_once(tmp_path):
+    directory = tmp_path / '2025-05-18'
+    directory.mkdir()
+    lines = []
+    for minute in range(20):
+        # 같은 줄이 다시 찍히는 사이에 다른 줄이 끼어 있어 작은 구간으로 나누면 경계를 넘는다
+        lines += [TICKET.format(minute=minute, verification=minute), FILLER.format(minute=minute),
+                  TICKET.format(minute=minute, verification=minute)]
+    (directory / '0.log').write_text(''.join(lines))
+
+    start = datetime(2025, 5, 18)
+    serial = report.create_aggregators()
+    feed_all(iter_lines_between(start, None, str(tmp_path), use_index=False), serial.values())
+    parallel = scan_parallel(start, None, report.create_aggregators, workers=2, root=str(tmp_path),
+                             use_index=False, chunk_bytes=150)
+
+    # 발급 줄마다 티켓 4장, 다시 찍힌 줄은 세지 않는다
+    assert serial[report.HANDLER_COUNT_KEY].result()[report.ISSUED_TICKET_KEY] == 20 * 4
+    assert parallel[report.HANDLER_COUNT_KEY].result() == serial[report.HANDLER_COUNT_KEY].result()
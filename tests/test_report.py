@@ -0,0 +1,34 @@
+import argparse
+from datetime import datetime
+
+import pytest
+
+import report
+
+NOW = datetime(2025, 5, 19, 20, 0)
+
+
+def test_parse_window_accepts_durations_and_start_times():
+    assert report.parse_window('2h', NOW) == (datetime(2025, 5, 19, 18, 0), 2, report.RECENT_ARCHIVE_PATH)
+    assert report.parse_window('2025-05-19 18:00', NOW) == (datetime(2025, 5, 19, 18, 0), None,
+                                                            report.SINCE_ARCHIVE_PATH)
+
+
+@pytest.mark.parametrize('text', ['30m', 'yesterday', '2025-05-20 00:00'])
+def test_parse_window_rejects_bad_windows(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        report.parse_window(text, NOW)
+
+
+def test_main_reports_usage_error_instead_of_crashing(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        report.main(['30m', '--dry-run'])
+    assert exc_info.value.code == 2
+    assert '30m' in capsys.readouterr().err
+
+
+def test_workers_require_no_rollup(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        report.main(['2h', '--workers', '4', '--dry-run'])
+    assert exc_info.value.code == 2
+    assert '--no-rollup' in capsys.readouterr().err
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import report
+from aggregators import feed_all
+from logreader import iter_lines_between
+from loggen import generate_lines
+from rollup import RollupStore
+
+START = datetime(2025, 5, 18)
+
+
+def summary(rollups):
+    return (rollups.visitor_count(START), dict(rollups.counts(START)),
+            {endpoint: stat.to_dict() for endpoint, stat in rollups.endpoint_stats(START).result().items()})
+
+
+def test_incremental_update_after_cut_line_matches_full_scan(tmp_path):
+    root = tmp_path / 'logs'
+    (root / '2025-05-18').mkdir(parents=True)
+    path = root / '2025-05-18' / '0.log'
+    text = ''.join(line for stamp, line in generate_lines(5000, START, notification_ratio=0.05, seed=3))
+    # 줄 중간에서 끊긴 상태로 한 번 읽고, 나머지가 붙은 뒤 다시 읽는다
+    cut = text.index('\n', len(text) // 2) - 20
+    path.write_text(text[:cut])
+
+    incremental = RollupStore(report.dispatcher, str(tmp_path / 'incremental.db'))
+    incremental.update(str(root))
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text[cut:])
+    incremental.update(str(root))
+
+    full = RollupStore(report.dispatcher, str(tmp_path / 'full.db'))
+    full.update(str(root))
+    assert summary(incremental) == summary(full)
+    assert sum(incremental.counts(START).values()) > 0
+
+    aggregators = report.create_aggregators()
+    feed_all(iter_lines_between(START, None, str(root), use_index=False), aggregators.values())
+    assert incremental.visitor_count(START) == aggregators[report.VISITOR_COUNT_KEY].result()
+    assert dict(incremental.counts(START)) == dict(aggregators[report.HANDLER_COUNT_KEY].result())
+    incremental.close()
+    full.close()
@@ -0,0 +1,40 @@
+import time
+
+from sinks import FileWriterPool, SlackSink
+
+
+class DeliveredSlack:
+    def mark(self):
+        return 0
+
+    def done(self, mark):
+        return True
+
+
+def test_checkpoint_waits_until_file_records_are_written(tmp_path):
+    path = str(tmp_path / 'createProfiles.txt')
+    sink = SlackSink(DeliveredSlack(), files=FileWriterPool(flush_interval=60))
+    sink.append(path, 'Created profile\n')
+    mark = sink.mark()
+    assert not sink.done(mark)
+
+    sink.close()
+    assert sink.done(mark)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == 'Created profile\n'
+
+
+def test_writer_thread_flushes_without_caller(tmp_path):
+    path = tmp_path / 'createProfiles.txt'
+    files = FileWriterPool(flush_interval=0.05, buffer_bytes=8)
+    files.start()
+    try:
+        files.write(str(path), 'Created profile\n')
+        mark = files.mark()
+        deadline = time.monotonic() + 2
+        while not files.done(mark) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert files.done(mark)
+        assert path.read_text(encoding='utf-8') == 'Created profile\n'
+    finally:
+        files.close()
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from slack import SlackDelivery
+
+# 서버가 받은 시각으로 재므로 요청 직전에 잰 클라이언트 간격보다 조금 짧게 보일 수 있다
+TOLERANCE = 0.05
+
+
+class StubSlack:
+    # 받은 요청을 기록하고, 미리 정한 순서대로 (상태, 헤더[, 본문]) 을 돌려주는 로컬 서버
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.received = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.received.append((time.monotonic(), body))
+                status, headers, *body = stub.responses.pop(0) if stub.responses else (200, {})
+                payload = json.dumps(body[0] if body else {'ok': True}).encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/chat.postMessage'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubSlack()
+    yield server
+    server.close()
+
+
+def deliver(stub, messages, **options):
+    slack = SlackDelivery('token', stub.url, **options)
+    slack.start()
+    for channel, text in messages:
+        assert slack.send(channel, text)
+    slack.stop(timeout=10)
+    return slack
+
+
+def test_done_only_after_queued_messages_finish(stub):
+    stub.responses = [(429, {'Retry-After': '0.3'}), (200, {})]
+    slack = SlackDelivery('token', stub.url, channel_interval=0.0, backoff=0.01)
+    slack.start()
+    slack.send('C1', 'hello')
+    mark = slack.mark()
+
+    assert not slack.done(mark)
+    slack.stop(timeout=10)
+    assert slack.done(mark)
+
+
+def test_retries_after_429_with_retry_after(stub):
+    stub.responses = [(429, {'Retry-After': '0.3'}), (200, {})]
+    slack = deliver(stub, [('C1', 'hello')], channel_interval=0.0, backoff=0.01)
+
+    assert [body['text'] for at, body in stub.received] == ['hello', 'hello']
+    assert stub.received[1][0] - stub.received[0][0] >= 0.3 - TOLERANCE
+    assert (slack.sent, slack.failed) == (1, 0)
+
+
+def test_waits_between_sends_to_the_same_channel(stub):
+    slack = deliver(stub, [('C1', 'a'), ('C1', 'b'), ('C2', 'c')], channel_interval=0.3)
+
+    sent_at = {body['text']: at for at, body in stub.received}
+    assert sent_at['b'] - sent_at['a'] >= 0.3 - TOLERANCE
+    # 다른 채널은 C1 의 간격을 기다리지 않는다
+    assert sent_at['c'] - sent_at['b'] < 0.3
+    assert slack.sent == 3
+
+
+def test_coalesces_messages_within_the_window(stub):
+    slack = deliver(stub, [('C1', 'a'), ('C1', 'b'), ('C2', 'c'), ('C1', 'd')],
+                    channel_interval=0.0, coalesce_window=0.3)
+
+    texts = sorted((body['channel'], body['text']) for at, body in stub.received)
+    assert texts == [('C1', 'a\n\nb\n\nd'), ('C2', 'c')]
+    assert slack.sent == 2
+
+
+def test_ok_false_response_counts_as_failed(stub):
+    stub.responses = [(200, {}, {'ok': False, 'error': 'channel_not_found'})]
+    slack = deliver(stub, [('C1', 'hello')], channel_interval=0.0, backoff=0.01)
+
+    assert len(stub.received) == 1
+    assert (slack.sent, slack.failed) == (0, 1)
+    assert slack.latency.quantile(0.5) is None
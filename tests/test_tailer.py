@@ -0,0 +1,58 @@
+import os
+
+from tailer import LogTailer
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_reads_only_appended_complete_lines(tmp_path):
+    path = str(tmp_path / '0.log')
+    append(path, 'old\n')
+    tailer = LogTailer(path)
+    assert list(tailer.read_lines()) == []
+
+    append(path, 'first\nsec')
+    assert list(tailer.read_lines()) == ['first\n']
+    append(path, 'ond\n')
+    assert list(tailer.read_lines()) == ['second\n']
+    assert tailer.offset == os.path.getsize(path)
+    tailer.close()
+
+
+def test_truncated_file_is_read_from_start(tmp_path):
+    path = str(tmp_path / '0.log')
+    append(path, 'a long line before truncation\n')
+    tailer = LogTailer(path, 0)
+    assert list(tailer.read_lines()) == ['a long line before truncation\n']
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('new\n')
+    assert list(tailer.read_lines()) == ['new\n']
+    assert tailer.offset == 4
+    tailer.close()
+
+
+def test_rotation_drains_old_file_before_new_one(tmp_path):
+    path = str(tmp_path / '0.log')
+    append(path, 'one\n')
+    tailer = LogTailer(path, 0)
+    assert list(tailer.read_lines()) == ['one\n']
+
+    # 회전 직전에 쓰인 줄과 개행 없는 꼬리도 새 파일보다 먼저 나와야 한다
+    append(path, 'two\ntail')
+    os.rename(path, str(tmp_path / '0.log.1'))
+    append(path, 'three\n')
+    assert list(tailer.read_lines()) == ['two\n', 'tail\n', 'three\n']
+    assert tailer.offset == len('three\n')
+    tailer.close()
+
+
+def test_offset_past_end_after_restart_starts_over(tmp_path):
+    path = str(tmp_path / '0.log')
+    append(path, 'short\n')
+    tailer = LogTailer(path, offset=1000)
+    assert list(tailer.read_lines()) == ['short\n']
+    tailer.close()
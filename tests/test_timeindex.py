@@ -0,0 +1,55 @@
+import random
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from timeindex import TimeIndex
+from timestamps import TimeWindow, format_timestamp
+
+START = datetime(2025, 5, 18)
+
+
+@pytest.fixture
+def day_log(tmp_path):
+    rng = random.Random(0)
+    lines = []
+    for i in range(3000):
+        # 가끔 몇 분 늦게 찍힌 줄과 시각 없는 스택 트레이스 줄이 섞인다
+        late = timedelta(minutes=rng.randint(1, 3)) if rng.random() < 0.05 else timedelta(0)
+        lines.append(f"{format_timestamp(START + timedelta(seconds=20 * i) - late)} [main]  INFO logger - line {i}\n")
+        if rng.random() < 0.02:
+            lines.append('\tat com.yourssu.signal.Handler.handle(Handler.java:42)\n')
+    path = tmp_path / '0.log'
+    path.write_text(''.join(lines))
+    return str(path), lines
+
+
+def read_from(path, offset, window):
+    with open(path, 'r', encoding='utf-8') as f:
+        f.seek(offset)
+        return [line for line in f if window.contains(line)]
+
+
+@pytest.mark.parametrize('tolerance', [timedelta(0), timedelta(minutes=5)])
+def test_seek_matches_linear_scan(day_log, tmp_path, tolerance):
+    path, lines = day_log
+    index = TimeIndex(path, interval=2048, index_dir=str(tmp_path / 'index'))
+    for minutes in range(0, 1000, 37):
+        start = START + timedelta(minutes=minutes)
+        window = TimeWindow(start)
+        expected = [line for line in lines if window.contains(line)]
+        assert read_from(path, index.seek_offset(start, tolerance), window) == expected
+
+
+def test_appended_lines_extend_saved_index(day_log, tmp_path):
+    path, lines = day_log
+    index_dir = str(tmp_path / 'index')
+    TimeIndex(path, interval=2048, index_dir=index_dir).update()
+    late = f"{format_timestamp(START + timedelta(days=1))} [main]  INFO logger - appended\n"
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(late)
+
+    index = TimeIndex(path, interval=2048, index_dir=index_dir)
+    start = START + timedelta(hours=23, minutes=59)
+    assert read_from(path, index.seek_offset(start), TimeWindow(start)) == [late]
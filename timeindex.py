@@ -0,0 +1,96 @@
+import bisect
+import json
+import os
+
+from datetime import datetime, timedelta
+
+from timestamps import TIMESTAMP_BYTES_PATTERN, TIMESTAMP_LENGTH, format_timestamp
+
+INDEX_INTERVAL_BYTES = 256 * 1024
+# 개행 없이 이어 붙은 줄처럼 인덱스가 시각을 못 본 줄을 위해 여유를 둔다
+INDEX_TOLERANCE = timedelta(minutes=5)
+INDEX_SUFFIX = '.idx'
+# 운영 로그 디렉터리를 건드리지 않도록 롤업 저장소 옆에 둔다. 빈 값이면 로그 파일 바로 옆에 만든다
+INDEX_DIR = os.getenv('LOG_INDEX_DIR', '/home/ubuntu/signal-api/log_index')
+
+
+def index_path_for(path, index_dir=INDEX_DIR, suffix=INDEX_SUFFIX) -> str:
+    if not index_dir:
+        return path + suffix
+    name = os.path.abspath(path).strip(os.sep).replace(os.sep, '_')
+    return os.path.join(index_dir, name + suffix)
+
+
+class TimeIndex:
+    def __init__(self, path, interval=INDEX_INTERVAL_BYTES, index_dir=INDEX_DIR):
+        self.path = path
+        self.index_path = index_path_for(path, index_dir)
+        self.interval = interval
+        self.inode = None
+        # 인덱스가 다룬 마지막 완성된 줄의 끝 위치
+        self.size = 0
+        # [블록 시작 위치, 그 블록까지의 최대 시각] - 최대 시각은 누적이라 항상 정렬되어 있다
+        self.entries = []
+        self._load()
+
+    def seek_offset(self, start_datetime: datetime, tolerance=INDEX_TOLERANCE) -> int:
+        self.update()
+        bound = format_timestamp(start_datetime - tolerance)
+        maximums = [maximum for offset, maximum in self.entries]
+        position = bisect.bisect_left(maximums, bound)
+        if position == len(self.entries):
+            return self.size
+        return self.entries[position][0]
+
+    def update(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            self.inode = stat.st_ino
+            self.size = 0
+            self.entries = []
+        if stat.st_size == self.size:
+            return
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.size)
+            offset = self.size
+            for raw in file:
+                if not raw.endswith(b'\n'):
+                    break
+                if not self.entries or offset - self.entries[-1][0] >= self.interval:
+                    previous = self.entries[-1][1] if self.entries else ''
+                    self.entries.append([offset, previous])
+                if TIMESTAMP_BYTES_PATTERN.match(raw):
+                    timestamp = raw[:TIMESTAMP_LENGTH].decode('ascii')
+                    if timestamp > self.entries[-1][1]:
+                        self.entries[-1][1] = timestamp
+                offset += len(raw)
+        self.size = offset
+        self._save()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('interval') != self.interval:
+            return
+        self.inode = data['inode']
+        self.size = data['size']
+        self.entries = data['entries']
+
+    def _save(self):
+        data = {'inode': self.inode, 'size': self.size, 'interval': self.interval, 'entries': self.entries}
+        tmp_path = f'{self.index_path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            # 인덱스 디렉터리에 쓸 수 없으면 이번 실행에서만 메모리로 사용
+            print(f"시간 인덱스 저장 실패: {self.index_path}, 에러: {e}")
@@ -0,0 +1,67 @@
+import re
+
+from datetime import datetime, timedelta
+
+# 로그 줄은 항상 '2025-05-18 01:36:18.703 ' 처럼 고정 길이로 시작한다
+TIMESTAMP_LENGTH = len('2025-05-18 01:36:18.703')
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3} ')
+TIMESTAMP_BYTES_PATTERN = re.compile(rb'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3} ')
+
+
+def has_timestamp(line) -> bool:
+    return TIMESTAMP_PATTERN.match(line) is not None
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:TIMESTAMP_LENGTH]
+
+
+def parse_timestamp(line) -> datetime:
+    # strptime 없이 고정 위치를 잘라서 만든다. datetime 이 꼭 필요할 때만 사용
+    return datetime(int(line[0:4]), int(line[5:7]), int(line[8:10]),
+                    int(line[11:13]), int(line[14:16]), int(line[17:19]), int(line[20:23]) * 1000)
+
+
+class TimeWindow:
+    def __init__(self, start: datetime = None, end: datetime = None):
+        # 로그 시각은 밀리초 단위라 문자열 비교로 같은 결과를 얻도록 경계를 밀리초로 맞춘다
+        self.lower = None
+        self.upper = None
+        if start is not None:
+            remainder = start.microsecond % 1000
+            if remainder:
+                start += timedelta(microseconds=1000 - remainder)
+            self.lower = format_timestamp(start)
+        if end is not None:
+            self.upper = format_timestamp(end)
+        self.lower_bytes = self.lower.encode('ascii') if self.lower is not None else None
+        self.upper_bytes = self.upper.encode('ascii') if self.upper is not None else None
+
+    def contains(self, line) -> bool:
+        if TIMESTAMP_PATTERN.match(line) is None:
+            return False
+        timestamp = line[:TIMESTAMP_LENGTH]
+        if self.lower is not None and timestamp < self.lower:
+            return False
+        if self.upper is not None and timestamp > self.upper:
+            return False
+        return True
+
+    def overlaps(self, first, last) -> bool:
+        # [first, last] 범위의 로그 중 창 안에 들 수 있는 줄이 있는지
+        if self.lower is not None and last < self.lower:
+            return False
+        if self.upper is not None and first > self.upper:
+            return False
+        return True
+
+    def contains_bytes(self, buffer, position=0) -> bool:
+        # mmap 위에서 디코딩 없이 바로 비교한다
+        if TIMESTAMP_BYTES_PATTERN.match(buffer, position) is None:
+            return False
+        timestamp = buffer[position:position + TIMESTAMP_LENGTH]
+        if self.lower_bytes is not None and timestamp < self.lower_bytes:
+            return False
+        if self.upper_bytes is not None and timestamp > self.upper_bytes:
+            return False
+        return True